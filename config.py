@@ -162,4 +162,47 @@ sheet_config_travel_journey = [
             }
         ]
     }
-]
\ No newline at end of file
+]
+
+# Traffic Counting REV-4 workbooks, cells as 0-based [row, col] of the HK_Arah*/HL_Arah* sheets
+sheet_config_traffic_counting = {
+    "config_data": [
+        [4, 2, "hari_tanggal"],
+        [4, 12, "cuaca"],
+        [5, 2, "nama_ruas_jalan"],
+        [5, 8, "koordinat_lokasi"],
+        [5, 12, "arah_dari"],
+        [6, 2, "surveyor_rekam_hitung"],
+        [6, 8, "durasi"],
+        [6, 12, "arah_menuju"],
+        [7, 2, "kode_lokasi"],
+        [7, 12, "kode_arah"],
+    ],
+    # Cells of the Profil_HK/Profil_HL sheets, stored with a _hk/_hl suffix
+    "config_data_profil": [
+        [6, 5, "catatan"],
+        [3, 9, "jam_puncak_arah_1"],
+        [4, 9, "vol_jam_puncak_arah_1"],
+        [6, 9, "jam_puncak_arah_2"],
+        [7, 9, "vol_jam_puncak_arah_2"],
+    ],
+    "table_data": {
+        "i": [12, 203],
+        "c": [1, 13],
+        "mapping_col": {
+            1: "rentang_survei",
+            2: "Gol-6",
+            3: "Gol-1-a",
+            4: "Gol-1-b",
+            5: "Gol-1-c",
+            6: "Gol-1-d",
+            7: "Gol-1-e",
+            8: "Gol-2",
+            9: "Gol-3",
+            10: "Gol-4",
+            11: "Gol-5",
+            12: "total_tanpa_sepeda_motor",
+            13: "total_dengan_sepeda_motor",
+        }
+    }
+}
@@ -0,0 +1,38 @@
+import importlib
+
+import streamlit as st
+
+
+# Dashboard tabs in sidebar order: header, module and function rendering the tab.
+# A tab's module (and the data it loads) is only imported once the tab is first selected.
+PAGES = {
+    "Traffic Counting": {
+        "header": "Survei Traffic Counting",
+        "module": "page.traffic_counting",
+        "show": "show_traffic_counting",
+    },
+    "Travel Journey": {
+        "header": "Survei Travel Journey",
+        "module": "page.travel_journey",
+        "show": "show_travel_journey",
+    },
+    "Asal Tujuan": {
+        "header": "Survei Asal Tujuan",
+        "module": "page.origin_destination",
+        "show": "show",
+    },
+}
+
+DEFAULT_PAGE = "Asal Tujuan"
+
+
+def render_page(tab_name):
+    """
+    Import the module of the selected tab on first use and render it.
+    Unknown tab names fall back to DEFAULT_PAGE.
+    """
+    page = PAGES.get(tab_name, PAGES[DEFAULT_PAGE])
+    module = importlib.import_module(page["module"])
+
+    st.header(page["header"])
+    getattr(module, page["show"])()
@@ -2,12 +2,23 @@ import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
 # from utils.util import engine, read_database
+from utils.snapshot import load_snapshot, snapshot_version
+from utils.density import density_frame
 import pandas as pd
 import numpy as np
 from data.config import od5_data, od7_data
 
+VEHICLE_TYPE_DATA_PATH = "data/origin_destination_vehicle_type_.pkl"
+ORIGIN_DEST_AGG_DATA_PATH = "data/origin_destination_agg.pkl"
+
+VEHICLE_TYPE_COLUMNS = ['kode_titik', '_jenis', 'count_vehicle']
+ORIGIN_DEST_AGG_COLUMNS = [
+    'kode_titik', 'asal_tempat', 'precentage_asal_tempat', 'tujuan_tempat', 'precentage_tujuan_tempat',
+    'asal_kab_kota', 'tujuan_kab_kota', '_count_origin_dest_kab_kota', 'count_origin_dest_kab_kota',
+    'asal_latitude', 'asal_longitude', 'tujuan_latitude', 'tujuan_longitude',
+]
+
 
-@st.cache_data
 def get_data_vehicle_type():
     # query = """
     #     select
@@ -32,9 +43,8 @@ def get_data_vehicle_type():
     #     ;
     # """
     # df = read_database(engine=engine, query=query)
-    return pd.read_pickle("data/origin_destination_vehicle_type_.pkl")
+    return load_snapshot(VEHICLE_TYPE_DATA_PATH, columns=VEHICLE_TYPE_COLUMNS)
 
-@st.cache_data
 def get_data_origin_dest_agg():
     # query = """
     #     with
@@ -188,7 +198,7 @@ def get_data_origin_dest_agg():
     # ;
     # """
     # df = read_database(engine=engine, query=query)
-    return pd.read_pickle("data/origin_destination_agg.pkl")
+    return load_snapshot(ORIGIN_DEST_AGG_DATA_PATH, columns=ORIGIN_DEST_AGG_COLUMNS)
 
 location_survey = {
     "RSI1": "Pelabuhan Merak",
@@ -214,86 +224,121 @@ display_text_select = {
     "RSI9": "OD9 - Pelabuhan Banyuwangi",
 }
 
-df_vehicle_type = get_data_vehicle_type()
-df_origin_dest_agg = get_data_origin_dest_agg()
-vehicle_type = df_vehicle_type["_jenis"].unique()
-kode_titik = df_vehicle_type["kode_titik"].unique()
+MAP_LINE_COLUMNS = {
+    'asal_latitude': 'asal_latitude',
+    'asal_longitude': 'asal_longitude',
+    'tujuan_latitude': 'tujuan_latitude',
+    'tujuan_longitude': 'tujuan_longitude',
+    'count_origin_dest_kab_kota': 'weight',
+    'asal_kab_kota': '_asal_kab_kota',
+    'tujuan_kab_kota': '_tujuan_kab_kota',
+}
+
+def map_line_frame(df_origin_dest_agg_selected):
+    """
+    Return the distinct OD pairs of one kode_titik with their coordinates and weight bucket.
+    """
+    return (
+        df_origin_dest_agg_selected[list(MAP_LINE_COLUMNS)]
+        .drop_duplicates()
+        .rename(columns=MAP_LINE_COLUMNS)
+        .reset_index(drop=True)
+    )
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def build_density_index(_df_origin_dest_agg, version):
+    """
+    Precompute the origin and destination density frames of every kode_titik.
+    `version` is the OD aggregate snapshot version and is the only cache key.
+
+    Returns:
+    --------
+    dict
+        {kode_titik: {"origin": DataFrame, "destination": DataFrame}}, see `utils.density.density_frame`
+    """
+    index = {}
+    for kode_titik, df_selected in _df_origin_dest_agg.groupby('kode_titik', sort=False):
+        df_map_line = map_line_frame(df_selected)
+        index[kode_titik] = {
+            "origin": density_frame(df_map_line['asal_longitude'], df_map_line['asal_latitude']),
+            "destination": density_frame(df_map_line['tujuan_longitude'], df_map_line['tujuan_latitude']),
+        }
+    return index
+
+def desire_line_traces(df_map_line):
+    """
+    Build the desire lines of an OD map, one trace per weight bucket.
+
+    The segments of a bucket share a single trace, separated by None so Plotly
+    does not connect them, which keeps one legend entry per weight.
+
+    Parameters:
+    -----------
+    df_map_line : pandas.DataFrame
+        One row per OD pair with columns
+        [asal_latitude, asal_longitude, tujuan_latitude, tujuan_longitude, weight]
+
+    Returns:
+    --------
+    list of go.Scattermapbox
+        Line traces ordered by weight
+    """
+    traces = []
+    for weight, df_weight in df_map_line.groupby('weight', sort=True):
+        n = len(df_weight)
+        lon = np.full(n * 3, None, dtype=object)
+        lat = np.full(n * 3, None, dtype=object)
+        lon[0::3] = df_weight['asal_longitude'].to_numpy()
+        lon[1::3] = df_weight['tujuan_longitude'].to_numpy()
+        lat[0::3] = df_weight['asal_latitude'].to_numpy()
+        lat[1::3] = df_weight['tujuan_latitude'].to_numpy()
+        traces.append(go.Scattermapbox(
+            mode="lines",
+            lon=lon,
+            lat=lat,
+            line=dict(width=weight / 20, color='blue'),
+            name=f': {weight}',
+        ))
+    return traces
 
 def chart_vehicle_origin_destination(kode_titik):
+    df_vehicle_type = get_data_vehicle_type()
+    df_origin_dest_agg = get_data_origin_dest_agg()
+    vehicle_type = df_vehicle_type["_jenis"].unique()
     df_vehicle_type_selected = df_vehicle_type.loc[df_vehicle_type['kode_titik'] == kode_titik]
     df_origin_dest_agg_selected = df_origin_dest_agg.loc[df_origin_dest_agg['kode_titik'] == kode_titik]
     df_origin_dest_map_line = df_origin_dest_agg_selected
     # df_origin_dest_map_line = df_origin_dest_agg_selected.loc[(df_origin_dest_agg_selected['asal_kab_kota'] != 'EKSTERNAL') & (df_origin_dest_agg_selected['tujuan_kab_kota'] != 'EKSTERNAL')]
-    values_vehicle_type = []
-    for _type in vehicle_type:
-        values_vehicle_type.append(int(df_vehicle_type_selected.loc[df_vehicle_type_selected['_jenis'] == _type, 'count_vehicle'].iloc[0]) if _type in df_vehicle_type_selected["_jenis"].values else 0)
-    
-    origin = []
-    destination = []
-    percentage_origin_dest_kab_kota = []
-    origin_kab_kota = []
-    dest_kab_kota = []
-    
-    concatenated_origin_dest_kab_kota = []
-    for idx, row in df_origin_dest_agg_selected.iterrows():
-        origin.append(row["asal_tempat"])
-        destination.append(row["tujuan_tempat"])
-        concatenated_origin_dest_kab_kota.append(f'{row["asal_kab_kota"]}|{row["tujuan_kab_kota"]}|{row["_count_origin_dest_kab_kota"]}')
-        
-    concatenated_origin_dest_kab_kota = list(set(concatenated_origin_dest_kab_kota))
-    for d in concatenated_origin_dest_kab_kota:
-        data = str(d).split('|')
-        origin_kab_kota.append(data[0])
-        dest_kab_kota.append(data[1])
-        percentage_origin_dest_kab_kota.append(int(data[2]))
-        
-    concatenated_origin_dest_lat_long = []
-    for idx, row in df_origin_dest_map_line.iterrows():
-        concatenated_origin_dest_lat_long.append(f'{row["asal_latitude"]}|{row["asal_longitude"]}|{row["tujuan_latitude"]}|{row["tujuan_longitude"]}|{row["count_origin_dest_kab_kota"]}|{row["asal_kab_kota"]}|{row["tujuan_kab_kota"]}')
-    concatenated_origin_dest_lat_long = list(set(concatenated_origin_dest_lat_long))
-    
-    asal_latitude = []
-    asal_longitude = []
-    tujuan_latitude = []
-    tujuan_longitude = []
-    weight = []
-    _asal_kab_kota = []
-    _tujuan_kab_kota = []
-    for d in concatenated_origin_dest_lat_long:
-        data = str(d).split('|')
-        asal_latitude.append(float(data[0]))
-        asal_longitude.append(float(data[1]))
-        tujuan_latitude.append(float(data[2]))
-        tujuan_longitude.append(float(data[3]))
-        weight.append(int(data[4]))
-        _asal_kab_kota.append(data[5])
-        _tujuan_kab_kota.append(data[6])
-    
-    df_map_line =  pd.DataFrame({
-        'asal_latitude': asal_latitude,
-        'asal_longitude': asal_longitude,
-        'tujuan_latitude': tujuan_latitude,
-        'tujuan_longitude': tujuan_longitude,
-        'weight': weight,
-        '_asal_kab_kota': _asal_kab_kota,
-        '_tujuan_kab_kota': _tujuan_kab_kota,
-    })
-    
+    values_vehicle_type = (
+        df_vehicle_type_selected.drop_duplicates('_jenis')
+        .set_index('_jenis')['count_vehicle']
+        .reindex(vehicle_type, fill_value=0)
+        .astype(int)
+        .tolist()
+    )
+
+    # Percentages are constant per asal_tempat/tujuan_tempat, keep the first row of each
+    df_origin = df_origin_dest_agg_selected.drop_duplicates('asal_tempat')
+    df_dest = df_origin_dest_agg_selected.drop_duplicates('tujuan_tempat')
+
+    df_map_line = map_line_frame(df_origin_dest_map_line)
+    density = build_density_index(df_origin_dest_agg, snapshot_version(ORIGIN_DEST_AGG_DATA_PATH))[kode_titik]
+
     data_matrix_origin = {
-        'Asal Perjalanan': list(set(origin)),
-        'Persentase': [df_origin_dest_agg_selected.loc[df_origin_dest_agg_selected['asal_tempat'] == x, 'precentage_asal_tempat'].iloc[0] for x in list(set(origin))]
+        'Asal Perjalanan': df_origin['asal_tempat'].tolist(),
+        'Persentase': df_origin['precentage_asal_tempat'].tolist()
     }
     data_matrix_dest = {
-        'Tujuan Perjalanan': list(set(destination)),
-        'Persentase': [df_origin_dest_agg_selected.loc[df_origin_dest_agg_selected['tujuan_tempat'] == x, 'precentage_tujuan_tempat'].iloc[0] for x in list(set(destination))]
-    }
-        
-    data_matrix_origin_dest = {
-        "Asal": origin_kab_kota,
-        "Tujuan": dest_kab_kota,
-        "Persentase": percentage_origin_dest_kab_kota
+        'Tujuan Perjalanan': df_dest['tujuan_tempat'].tolist(),
+        'Persentase': df_dest['precentage_tujuan_tempat'].tolist()
     }
-    df_matrix_origin_dest = pd.DataFrame(data_matrix_origin_dest)
+
+    df_matrix_origin_dest = (
+        df_origin_dest_agg_selected[['asal_kab_kota', 'tujuan_kab_kota', '_count_origin_dest_kab_kota']]
+        .drop_duplicates()
+        .rename(columns={'asal_kab_kota': 'Asal', 'tujuan_kab_kota': 'Tujuan', '_count_origin_dest_kab_kota': 'Persentase'})
+        .reset_index(drop=True)
+    )
     
     if kode_titik == "RSI5":
         df_matrix_origin_dest = pd.DataFrame(od5_data, columns=['Asal', 'Tujuan', 'Persentase'])
@@ -394,42 +439,14 @@ def chart_vehicle_origin_destination(kode_titik):
             center={"lat": -7.5, "lon": 111.5},
             title=f"Desire Line Map {display_text_select[kode_titik]}"
         )
-        weight_flag = {}
-        for i in range(len(df_map_line)):
-            weight_flag[df_map_line["weight"][i]] = False if df_map_line["weight"][i] in weight_flag else True
-            
-            fig_map_line.add_trace(go.Scattermapbox(
-                mode="lines",
-                lon=[df_map_line['asal_longitude'][i], df_map_line['tujuan_longitude'][i]],
-                lat=[df_map_line['asal_latitude'][i], df_map_line['tujuan_latitude'][i]],
-                line=dict(width=df_map_line['weight'][i] / 20, color='blue'),
-                showlegend=weight_flag[df_map_line["weight"][i]],
-                name=f': {df_map_line["weight"][i]}' if weight_flag[df_map_line["weight"][i]] else None
-            ))
+        fig_map_line.add_traces(desire_line_traces(df_map_line))
             
         fig_map_line.update_layout(height=800)
             
         st.plotly_chart(fig_map_line)
         
     with st.container(border=True):
-        data_dist_origin = {
-            'latitude': asal_latitude,
-            'longitude': asal_longitude,
-        }
-        df_dist_origin = pd.DataFrame(data_dist_origin)
-
-
-        x_bins = np.linspace(df_dist_origin['longitude'].min(), df_dist_origin['longitude'].max(), 10)
-        y_bins = np.linspace(df_dist_origin['latitude'].min(), df_dist_origin['latitude'].max(), 10)
-        hist, x_edges, y_edges = np.histogram2d(df_dist_origin['longitude'], df_dist_origin['latitude'], bins=[x_bins, y_bins])
-
-        density = []
-        for lon, lat in zip(df_dist_origin['longitude'], df_dist_origin['latitude']):
-            x_bin = min(max(np.digitize(lon, x_edges) - 1, 0), hist.shape[0] - 1)
-            y_bin = min(max(np.digitize(lat, y_edges) - 1, 0), hist.shape[1] - 1)
-            density.append(hist[x_bin, y_bin])
-
-        df_dist_origin['keterangan'] = density
+        df_dist_origin = density["origin"]
 
         fig_dist_origin = px.density_mapbox(
             df_dist_origin,
@@ -457,24 +474,7 @@ def chart_vehicle_origin_destination(kode_titik):
         
         # =========
         
-        data_dist_dest = {
-            'latitude': tujuan_latitude,
-            'longitude': tujuan_longitude,
-        }
-        df_dist_dest = pd.DataFrame(data_dist_dest)
-
-
-        x_bins = np.linspace(df_dist_dest['longitude'].min(), df_dist_dest['longitude'].max(), 10)
-        y_bins = np.linspace(df_dist_dest['latitude'].min(), df_dist_dest['latitude'].max(), 10)
-        hist, x_edges, y_edges = np.histogram2d(df_dist_dest['longitude'], df_dist_dest['latitude'], bins=[x_bins, y_bins])
-
-        density = []
-        for lon, lat in zip(df_dist_dest['longitude'], df_dist_dest['latitude']):
-            x_bin = min(max(np.digitize(lon, x_edges) - 1, 0), hist.shape[0] - 1)
-            y_bin = min(max(np.digitize(lat, y_edges) - 1, 0), hist.shape[1] - 1)
-            density.append(hist[x_bin, y_bin])
-
-        df_dist_dest['keterangan'] = density
+        df_dist_dest = density["destination"]
 
         fig_dist_dest = px.density_mapbox(
             df_dist_dest,
@@ -517,6 +517,7 @@ def chart_vehicle_origin_destination(kode_titik):
         
         
 def show():
+    kode_titik = get_data_vehicle_type()["kode_titik"].unique()
     kode_titik_select = st.selectbox("Filter Kode Titik", sorted(kode_titik), key=f"kode_titik_select", format_func=lambda x: display_text_select[x])
     chart_vehicle_origin_destination(kode_titik_select)
 
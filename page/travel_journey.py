@@ -1,21 +1,59 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from utils.downsample import douglas_peucker_indices, lttb_indices
+from utils.snapshot import (
+    read_derived_snapshot, read_snapshot_file, resolve_snapshot_path, snapshot_version, sources_hash,
+    write_derived_snapshot,
+)
+
+TRAVEL_JOURNEY_DATA_PATH = "data/survey_travel_journey.feather"
+TRAVEL_JOURNEY_JARAK_DATA_PATH = "data/survey_travel_journey_jarak.feather"
+
+# Columns of the raw GPS tracking data rendered by the Travel Journey tab
+TRAVEL_JOURNEY_COLUMNS = [
+    'sheet', 'arah', 'arah_awal', 'arah_akhir', 'gmap',
+    'timestamp', 'kmph', 'x', 'y', 'waktu_menit', 'jarak_km',
+]
+TRAVEL_JOURNEY_JARAK_COLUMNS = ['jarak', 'arah', 'sheet', 'seq']
+
+# Data derived from the two snapshots above, rebuilt whenever their content changes
+TRAVEL_JOURNEY_SPEED_DATA_PATH = "data/survey_travel_journey_speed.arrow"
+TRAVEL_JOURNEY_STEP_DATA_PATH = "data/survey_travel_journey_step.arrow"
+
+# GPS points drawn per route map panel at zoom 9, doubled every two zoom levels, unless full resolution is on
+ROUTE_MAP_POINTS_PER_PANEL = 1000
+# GPS points drawn per line of the time vs. distance charts, unless full resolution is on
+LINECHART_POINTS_PER_LINE = 1000
+# Hover of the time vs. distance charts, formatted by Plotly from the x (jarak_km) and y (waktu_menit) values
+LINECHART_HOVERTEMPLATE = 'Waktu: %{y:.1f} menit<br>Jarak: %{x:.2f} km<extra></extra>'
+
+
+# The functions below are cached on a cheap `version` token (file mtime/size or content
+# hash) instead of their DataFrame arguments, which are prefixed with `_` so Streamlit
+# does not hash them. Cache hits therefore cost the same however large the GPS traces are.
+# The returned DataFrames are shared between sessions and must not be modified in place.
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _load_travel_journey_data(version):
+    df = read_snapshot_file(resolve_snapshot_path(TRAVEL_JOURNEY_DATA_PATH), columns=TRAVEL_JOURNEY_COLUMNS)
+    df['arah'] = df['arah'].str.replace(r'\s+-\s+', ' - ', regex=True).str.strip()
+    # Normalize the mixed timestamp formats once, see `convert_timestamp_column`
+    return convert_timestamp_column(df)
 
-
-@st.cache_data
 def load_travel_journey_data():
-    df = pd.read_feather("data/survey_travel_journey.feather")
-    df['arah'] = df['arah'].str.replace(r'\s+-\s+', ' - ', regex=True).str.strip()
+    return _load_travel_journey_data(snapshot_version(TRAVEL_JOURNEY_DATA_PATH))
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _load_travel_journey_jarak_data(version):
+    df = read_snapshot_file(resolve_snapshot_path(TRAVEL_JOURNEY_JARAK_DATA_PATH), columns=TRAVEL_JOURNEY_JARAK_COLUMNS)
     return df
 
-@st.cache_data
 def load_travel_journey_jarak_data():
-    df = pd.read_feather("data/survey_travel_journey_jarak.feather")
-    return df
+    return _load_travel_journey_jarak_data(snapshot_version(TRAVEL_JOURNEY_JARAK_DATA_PATH))
 
-@st.cache_data
 def clean_raw_tracking_data(raw_data_df):
     """
     Create a clean DataFrame with unique sheet, direction, and gmap values.
@@ -33,11 +71,13 @@ def clean_raw_tracking_data(raw_data_df):
     gmap_df = raw_data_df[['sheet', 'gmap']].drop_duplicates().reset_index(drop=True)
     return gmap_df
 
-@st.cache_data
 def process_distance_sheets(checkpoint_data, gmap_data):
     """
     Process distance data from multiple sheets and add calculated columns.
     
+    Checkpoint distances are scaled so every (sheet, arah) route sums up to the
+    sheet's gmap distance, in one grouped pass over all routes.
+    
     Parameters:
     -----------
     checkpoint_data : pandas.DataFrame
@@ -52,185 +92,280 @@ def process_distance_sheets(checkpoint_data, gmap_data):
     """
     # Create a copy to avoid modifying the original DataFrame
     result_df = checkpoint_data.copy()
+    route = [result_df['sheet'], result_df['arah']]
     
-    # Initialize new columns
-    result_df['checkpoint_distance'] = 0.0
-    result_df['checkpoint_distance_cumsum'] = 0.0
+    # gmap value of each row's sheet, the first one if a sheet has several
+    gmap_value = result_df['sheet'].map(gmap_data.drop_duplicates('sheet').set_index('sheet')['gmap'])
     
-    # Process each unique combination of sheet and direction
-    for sheet in checkpoint_data['sheet'].unique():
-        for direction in checkpoint_data[checkpoint_data['sheet'] == sheet]['arah'].unique():
-            # Create mask for current sheet and direction
-            mask = (result_df['sheet'] == sheet) & (result_df['arah'] == direction)
-            
-            # Get subset of data
-            subset = result_df[mask]
-            
-            # Calculate total distance for this direction
-            total_distance = subset['jarak'].sum()
-            
-            # Get gmap value from the gmap DataFrame
-            gmap_value = gmap_data[
-                gmap_data['sheet'] == sheet
-            ]['gmap'].iloc[0]
-            
-            # Calculate checkpoint distance
-            checkpoint_distances = subset['jarak'].apply(
-                lambda x: x * gmap_value / total_distance if total_distance != 0 else 0
-            )
-            
-            # Assign calculated values
-            result_df.loc[mask, 'checkpoint_distance'] = checkpoint_distances
-            result_df.loc[mask, 'checkpoint_distance_cumsum'] = checkpoint_distances.cumsum()
+    # Total distance of each row's route
+    total_distance = result_df['jarak'].groupby(route).transform('sum')
+    
+    # Calculate checkpoint distance, 0 for routes without distance
+    result_df['checkpoint_distance'] = (result_df['jarak'] * gmap_value / total_distance).where(total_distance != 0, 0.0)
+    result_df['checkpoint_distance_cumsum'] = result_df['checkpoint_distance'].groupby(route).cumsum()
     
     return result_df
 
-@st.cache_data
-def add_time_and_speed(check_point_data, raw_tracking_data):
+def lookup_times(distances, ref_distances, ref_times, interpolate=False):
+    """
+    Look up the travel time at each checkpoint distance on a GPS trace.
+
+    The trace is sorted once and every checkpoint is located with a binary search,
+    so a route costs O(n log n + k log n) instead of a full scan per checkpoint.
+
+    Parameters:
+    -----------
+    distances : array-like
+        Checkpoint distances (km) to look up
+    ref_distances : array-like
+        Cumulative distance (km) of every GPS sample
+    ref_times : array-like
+        Cumulative time (minutes) of every GPS sample
+    interpolate : bool
+        If True, interpolate linearly between the two neighboring samples
+        instead of taking the time of the closest sample
+
+    Returns:
+    --------
+    numpy.ndarray
+        Time (minutes) at each checkpoint, 0 for a checkpoint at distance 0
+    """
+    distances = np.asarray(distances, dtype=float)
+    ref_distances = np.asarray(ref_distances, dtype=float)
+    ref_times = np.asarray(ref_times, dtype=float)
+
+    valid = ~np.isnan(ref_distances)
+    ref_distances = ref_distances[valid]
+    ref_times = ref_times[valid]
+    order = np.argsort(ref_distances, kind='stable')
+    ref_distances = ref_distances[order]
+    ref_times = ref_times[order]
+
+    if len(ref_distances) == 0:
+        raise ValueError("No GPS samples with a distance")
+
+    # Duplicate distances resolve to their first sample
+    unique_distances, first_idx = np.unique(ref_distances, return_index=True)
+    unique_times = ref_times[first_idx]
+
+    if interpolate:
+        times = np.interp(distances, unique_distances, unique_times)
+    else:
+        right = np.clip(np.searchsorted(unique_distances, distances, side='left'), 1, len(unique_distances) - 1)
+        left = right - 1
+        # Ties go to the shorter distance
+        take_left = np.abs(distances - unique_distances[left]) <= np.abs(unique_distances[right] - distances)
+        if len(unique_distances) == 1:
+            take_left[:] = True
+        times = unique_times[np.where(take_left, left, right)]
+
+    return np.where(distances == 0, 0.0, times)
+
+def add_time_and_speed(check_point_data, raw_tracking_data, interpolate=False):
     """
     Add time values and speed calculations to checkpoint DataFrame.
     
+    Every (sheet, arah) route of `check_point_data` is looked up on the GPS trace
+    of the same route in `raw_tracking_data`. Routes without a trace, or whose
+    trace has no distances, are skipped with a warning, and routes that fail are
+    skipped with an error message.
+    
     Parameters:
     -----------
     check_point_data : pandas.DataFrame
-        DataFrame with checkpoint distances
+        DataFrame with checkpoint distances, ordered by seq within each route
     raw_tracking_data : pandas.DataFrame
         Reference DataFrame with detailed journey data
+    interpolate : bool
+        Interpolate checkpoint times between GPS samples, see `lookup_times`
         
     Returns:
     --------
     pandas.DataFrame
-        Checkpoint DataFrame with added time and speed columns
+        Checkpoint DataFrame of the processed routes with added time and speed columns
     """
-    def find_closest_time(distance, ref_subset):
-        """Find the time value for the closest matching distance"""
-        if distance == 0:
-            return 0.0
-        
-        # Get the closest distance match
-        idx = (ref_subset['jarak_km'] - distance).abs().idxmin()
-        return ref_subset.loc[idx, 'waktu_menit']
-    
     # Create a copy to avoid modifying the original
-    result_df = check_point_data.copy()
-    
-    # Get the sheet and direction
-    sheet = result_df['sheet'].iloc[0]
-    direction = result_df['arah'].iloc[0]
-    
-    # Filter reference data for this sheet and direction
-    ref_subset = raw_tracking_data[
-        raw_tracking_data['sheet'] == sheet
-    ].copy()
-    
-    # Sort reference data by distance
-    ref_subset = ref_subset.sort_values('jarak_km')
+    result_df = check_point_data.reset_index(drop=True)
+    
+    # Add time column by looking up the checkpoint distances on each route's trace
+    traces = raw_tracking_data.groupby(['sheet', 'arah'], sort=False)
+    checkpoint_distances = result_df['checkpoint_distance_cumsum'].to_numpy()
+    times = np.full(len(result_df), np.nan)
+    processed = np.zeros(len(result_df), dtype=bool)
+    for (sheet, arah), positions in result_df.groupby(['sheet', 'arah'], sort=False).indices.items():
+        if (sheet, arah) not in traces.groups or traces.get_group((sheet, arah))['jarak_km'].isna().all():
+            print(f"Warning: No raw tracking data found for {sheet} {arah}")
+            continue
+        trace = traces.get_group((sheet, arah))
+        try:
+            times[positions] = lookup_times(
+                checkpoint_distances[positions], trace['jarak_km'], trace['waktu_menit'], interpolate=interpolate,
+            )
+        except Exception as e:
+            print(f"Error processing {sheet} {arah}: {str(e)}")
+            continue
+        processed[positions] = True
+    result_df['t'] = times
+    result_df = result_df[processed].reset_index(drop=True)
+    route = [result_df['sheet'], result_df['arah']]
     
-    # Add time column by looking up closest distance match
-    result_df['t'] = result_df['checkpoint_distance_cumsum'].apply(
-        lambda x: find_closest_time(x, ref_subset)
-    )
+    # Calculate time difference with previous row, the first row of a route has no previous row
+    result_df['t_diff'] = result_df['t'].groupby(route).diff()
     
-    # Calculate time difference with previous row
-    result_df['t_diff'] = result_df['t'].diff()
-    # Set first row's diff to null since there's no previous row
-    result_df.loc[result_df.index[0], 't_diff'] = None
-    
-    # Calculate speed (km/h) = (distance in km / time in minutes) * 60
-    result_df['speed'] = result_df.apply(
-        lambda row: (row['checkpoint_distance'] / row['t_diff'] * 60) 
-        if pd.notnull(row['t_diff']) and row['t_diff'] != 0 
-        else None, 
-        axis=1
-    )
+    # Calculate speed (km/h) = (distance in km / time in minutes) * 60, undefined when no time elapsed
+    result_df['speed'] = result_df['checkpoint_distance'] / result_df['t_diff'].where(result_df['t_diff'] != 0) * 60
     
     return result_df
 
-@st.cache_data
-def process_all_sheets(scaled_checkpoints_df, raw_tracking_data):
+def process_all_sheets(scaled_checkpoints_df, raw_tracking_data, interpolate=False):
     """
     Process time and speed calculations for all sheets and directions.
     
+    Sheets whose raw data is split in AM/PM periods get one copy of their
+    checkpoints per period ('arah A' becomes 'arah A - AM' and 'arah A - PM').
+    Routes without raw tracking data are skipped with a warning, and routes that
+    fail are skipped with an error message, see `add_time_and_speed`.
+    
     Parameters:
     -----------
     scaled_checkpoints_df : pandas.DataFrame
         DataFrame with scaled checkpoint distances
     raw_tracking_data : pandas.DataFrame
         Raw tracking data with time information
+    interpolate : bool
+        Interpolate checkpoint times between GPS samples, see `lookup_times`
         
     Returns:
     --------
     pandas.DataFrame
         Complete DataFrame with time and speed for all sheets
     """
-    all_results = []
-    
-    # Get unique sheets
-    for sheet in scaled_checkpoints_df['sheet'].unique():
-        # Check if this sheet has AM/PM splits in raw data
-        raw_sheet_data = raw_tracking_data[raw_tracking_data['sheet'] == sheet]
-        has_am_pm = any('AM' in arah or 'PM' in arah for arah in raw_sheet_data['arah'].unique())
-        
-        # Process each direction
-        for base_arah in scaled_checkpoints_df[scaled_checkpoints_df['sheet'] == sheet]['arah'].unique():
-            if has_am_pm:
-                # Process AM and PM separately
-                for period in ['AM', 'PM']:
-                    # Get checkpoint data (same for AM/PM)
-                    checkpoint_subset = scaled_checkpoints_df[
-                        (scaled_checkpoints_df['sheet'] == sheet) & 
-                        (scaled_checkpoints_df['arah'] == base_arah)
-                    ].copy()
-                    
-                    # Get raw data for this period
-                    period_arah = f"{base_arah} - {period}"
-                    raw_data_subset = raw_tracking_data[
-                        (raw_tracking_data['sheet'] == sheet) & 
-                        (raw_tracking_data['arah'] == period_arah)
-                    ].copy()
-                    
-                    if raw_data_subset.empty:
-                        print(f"Warning: No raw tracking data found for {sheet} {period_arah}")
-                        continue
-                    
-                    # Update arah in checkpoint data to match period
-                    checkpoint_subset['arah'] = period_arah
-                    
-                    try:
-                        result = add_time_and_speed(checkpoint_subset, raw_data_subset)
-                        all_results.append(result)
-                    except Exception as e:
-                        print(f"Error processing {sheet} {period_arah}: {str(e)}")
-            
-            else:
-                # Process regular A/B direction
-                checkpoint_subset = scaled_checkpoints_df[
-                    (scaled_checkpoints_df['sheet'] == sheet) & 
-                    (scaled_checkpoints_df['arah'] == base_arah)
-                ].copy()
-                
-                raw_data_subset = raw_tracking_data[
-                    (raw_tracking_data['sheet'] == sheet) & 
-                    (raw_tracking_data['arah'] == base_arah)
-                ].copy()
-                
-                if raw_data_subset.empty:
-                    print(f"Warning: No raw tracking data found for {sheet} {base_arah}")
-                    continue
-                
-                try:
-                    result = add_time_and_speed(checkpoint_subset, raw_data_subset)
-                    all_results.append(result)
-                except Exception as e:
-                    print(f"Error processing {sheet} {base_arah}: {str(e)}")
+    # Routes present in the raw data, and whether their sheet has AM/PM splits
+    raw_routes = raw_tracking_data[['sheet', 'arah']].drop_duplicates()
+    am_pm_sheets = raw_routes.loc[raw_routes['arah'].str.contains('AM|PM'), 'sheet'].unique()
+    
+    checkpoints = scaled_checkpoints_df.copy()
+    checkpoints['_sheet_order'] = pd.factorize(checkpoints['sheet'])[0]
+    checkpoints['_arah_order'] = pd.factorize(checkpoints['sheet'] + '|' + checkpoints['arah'])[0]
+    checkpoints['_period_order'] = 0
+    checkpoints['_row_order'] = np.arange(len(checkpoints))
+    
+    # Checkpoint data is the same for AM and PM, only arah changes to match the period
+    is_am_pm = checkpoints['sheet'].isin(am_pm_sheets)
+    periods = []
+    for period_order, period in enumerate(['AM', 'PM']):
+        period_checkpoints = checkpoints[is_am_pm].copy()
+        period_checkpoints['arah'] = period_checkpoints['arah'] + f' - {period}'
+        period_checkpoints['_period_order'] = period_order
+        periods.append(period_checkpoints)
+    checkpoints = pd.concat([checkpoints[~is_am_pm], *periods], ignore_index=True)
+    checkpoints = checkpoints.sort_values(['_sheet_order', '_arah_order', '_period_order', '_row_order'], kind='stable')
+    
+    # Skip routes without raw tracking data
+    checkpoints = checkpoints.merge(raw_routes, on=['sheet', 'arah'], how='left', indicator=True, sort=False)
+    missing = checkpoints.loc[checkpoints['_merge'] == 'left_only', ['sheet', 'arah']].drop_duplicates()
+    for sheet, arah in missing.itertuples(index=False):
+        print(f"Warning: No raw tracking data found for {sheet} {arah}")
+    checkpoints = checkpoints[checkpoints['_merge'] == 'both'].drop(
+        columns=['_sheet_order', '_arah_order', '_period_order', '_row_order', '_merge']
+    )
     
-    if not all_results:
+    result_df = add_time_and_speed(checkpoints, raw_tracking_data, interpolate=interpolate)
+    if result_df.empty:
         raise ValueError("No data was successfully processed")
     
-    # Combine all results
-    final_df = pd.concat(all_results, ignore_index=True)
+    return result_df
+
+def build_step_data(speed_df):
+    """
+    Build the step line data of every direction of every sheet at once.
+    
+    The x coordinates of a sheet come from its 'arah A' direction (or its first
+    direction if it has none). For each direction, with speeds s sorted by seq:
+    
+    - arah A starts at (0, s[1]), steps from s[i] to s[i+1] at x[i] and ends at (x[-1], s[-1])
+    - arah B starts at (0, s[0]), steps from s[i] to s[i+1] at x[i+1] and ends at x[-1]
+      with the last speed drawn
     
-    return final_df
+    Steps into a missing speed are skipped and repeated points are removed.
+    
+    Parameters:
+    -----------
+    speed_df : pandas.DataFrame
+        Output of `process_all_sheets`
+        
+    Returns:
+    --------
+    pandas.DataFrame
+        Step data with columns [sheet, arah, x, y], directions in order of appearance.
+        A direction without any point has a single row with x = NaN.
+    """
+    df = speed_df[['sheet', 'arah', 'seq', 'checkpoint_distance_cumsum', 'speed']].copy()
+    df['_sheet_order'] = pd.factorize(df['sheet'])[0]
+    df['_route'] = pd.factorize(df['sheet'] + '|' + df['arah'])[0]
+    df = df.sort_values(['_sheet_order', '_route', 'seq'], kind='stable').reset_index(drop=True)
+    
+    route = df.groupby('_route', sort=False)
+    df['_pos'] = route.cumcount()
+    df['_n'] = route['seq'].transform('size')
+    df['_speed_next'] = route['speed'].shift(-1)
+    is_a = df['arah'].str.contains('arah A', regex=False).to_numpy()
+    
+    # Reference x coordinates of each sheet, by position
+    ref_route = df.groupby('sheet')['_route'].min()
+    ref_route.update(df[is_a].groupby('sheet')['_route'].min())
+    is_ref = df['_route'] == df['sheet'].map(ref_route)
+    ref = df.loc[is_ref, ['sheet', '_pos', 'checkpoint_distance_cumsum']]
+    x_ref = ref.set_index(['sheet', '_pos'])['checkpoint_distance_cumsum']
+    x_end = ref.groupby('sheet')['checkpoint_distance_cumsum'].last()
+    
+    # Arah A steps at the current checkpoint, arah B at the next one
+    pos = df['_pos'].to_numpy()
+    n = df['_n'].to_numpy()
+    step_pos = np.where(is_a, pos, pos + 1)
+    step_x = x_ref.reindex(pd.MultiIndex.from_arrays([df['sheet'], step_pos])).to_numpy()
+    speed = df['speed'].to_numpy()
+    speed_next = df['_speed_next'].to_numpy()
+    is_step = (pos <= n - 2) & (pos >= np.where(is_a, 1, 0)) & ~np.isnan(speed_next)
+    
+    # Start point: second speed for arah A, first speed for arah B
+    start_speed = np.where(is_a, speed_next, speed)
+    is_start = (pos == 0) & ~np.isnan(start_speed)
+    
+    route_ids = df['_route'].to_numpy()
+    starts = pd.DataFrame({'_route': route_ids[is_start], '_order': -1, 'x': 0.0, 'y': start_speed[is_start]})
+    steps = pd.DataFrame({
+        '_route': np.repeat(route_ids[is_step], 2),
+        '_order': np.stack([2 * pos[is_step], 2 * pos[is_step] + 1], axis=1).ravel(),
+        'x': np.repeat(step_x[is_step], 2),
+        'y': np.stack([speed[is_step], speed_next[is_step]], axis=1).ravel(),
+    })
+    points = pd.concat([starts, steps], ignore_index=True).sort_values(['_route', '_order'], kind='stable')
+    
+    # End point: last speed for arah A, last speed drawn for arah B (only if something was drawn)
+    last = df[pos == n - 1]
+    last_drawn = points.groupby('_route')['y'].last()
+    end_y = np.where(is_a[last.index], last['speed'], last['_route'].map(last_drawn))
+    has_end = is_a[last.index] | last['_route'].isin(last_drawn.index).to_numpy()
+    ends = pd.DataFrame({
+        '_route': last['_route'].to_numpy()[has_end],
+        '_order': np.iinfo(np.int64).max,
+        'x': last['sheet'].map(x_end).to_numpy()[has_end],
+        'y': end_y[has_end],
+    })
+    
+    # Directions without any point keep a placeholder row with x = NaN, so they still get a (empty) line
+    empty = np.setdiff1d(df['_route'].unique(), np.concatenate([points['_route'], ends['_route']]))
+    placeholders = pd.DataFrame({'_route': empty, '_order': 0, 'x': np.nan, 'y': np.nan})
+    
+    points = pd.concat([points, ends, placeholders], ignore_index=True).sort_values(['_route', '_order'], kind='stable')
+    points = points.drop_duplicates(['_route', 'x', 'y'])
+    
+    routes = df.drop_duplicates('_route').set_index('_route')[['sheet', 'arah']]
+    step_data_df = routes.loc[points['_route']].reset_index(drop=True)
+    step_data_df['x'] = points['x'].to_numpy()
+    step_data_df['y'] = points['y'].to_numpy()
+    return step_data_df
 
 def create_step_data_for_sheet(df):
     """
@@ -248,74 +383,53 @@ def create_step_data_for_sheet(df):
         Dictionary of pandas.DataFrames with direction as key and step data as value
         Each DataFrame has columns 'x' and 'y' for step line plotting
     """
-    # Get all unique directions
-    directions = df['arah'].unique()
-    
-    # Get reference x coordinates from arah A - AM (or first available direction if A-AM doesn't exist)
-    ref_direction = next((d for d in directions if 'arah A' in d), directions[0])
-    df_ref = df[df['arah'] == ref_direction].sort_values('seq').reset_index(drop=True)
-    x_points = df_ref['checkpoint_distance_cumsum'].tolist()
-    
-    # Dictionary to store results
-    step_data = {}
-    
-    # Process each direction
-    for direction in directions:
-        df_dir = df[df['arah'] == direction].sort_values('seq').reset_index(drop=True)
-        x_coords = []
-        y_coords = []
-        
-        if 'arah A' in direction:
-            # First segment for Arah A - use second row's speed
-            if len(df_dir) > 1 and not pd.isna(df_dir['speed'].iloc[1]):
-                x_coords.append(0)
-                y_coords.append(df_dir['speed'].iloc[1])
-            
-            # Process transitions forward
-            for i in range(1, len(df_dir)-1):
-                if not pd.isna(df_dir['speed'].iloc[i+1]):
-                    # Add current point with current speed
-                    x_coords.append(x_points[i])
-                    y_coords.append(df_dir['speed'].iloc[i])
-                    
-                    # Add same point with next speed
-                    x_coords.append(x_points[i])
-                    y_coords.append(df_dir['speed'].iloc[i+1])
-            
-            # Add final point
-            if len(df_dir) > 0:
-                x_coords.append(x_points[-1])
-                y_coords.append(df_dir['speed'].iloc[-1])
-                
-        else:
-            # First segment for Arah B - use first row's speed
-            if len(df_dir) > 0 and not pd.isna(df_dir['speed'].iloc[0]):
-                x_coords.append(0)
-                y_coords.append(df_dir['speed'].iloc[0])
-            
-            # Process transitions backward
-            for i in range(0, len(df_dir)-1):
-                if not pd.isna(df_dir['speed'].iloc[i+1]):
-                    # Add current point with current speed
-                    x_coords.append(x_points[i+1])
-                    y_coords.append(df_dir['speed'].iloc[i])
-                    
-                    # Add same point with next speed
-                    x_coords.append(x_points[i+1])
-                    y_coords.append(df_dir['speed'].iloc[i+1])
-            
-            # Add final point with the last known speed value
-            if len(df_dir) > 0 and y_coords:  # Check if we have any y coordinates
-                x_coords.append(x_points[-1])
-                y_coords.append(y_coords[-1])  # Use the last known speed instead of df_dir['speed'].iloc[-1]
-        
-        # Create DataFrame and remove duplicates
-        step_data[direction] = pd.DataFrame({
-            'x': x_coords,
-            'y': y_coords
-        }).drop_duplicates()
+    return get_step_data_for_sheet(build_step_data(df), df['sheet'].iloc[0])
+
+def get_step_data_for_sheet(step_data_df, sheet):
+    """
+    Return the step data of one sheet from `build_step_data` output, in the
+    dictionary form returned by `create_step_data_for_sheet`.
+    """
+    sheet_df = step_data_df[step_data_df['sheet'] == sheet]
+    return {
+        direction: step_df.loc[step_df['x'].notna(), ['x', 'y']].reset_index(drop=True)
+        for direction, step_df in sheet_df.groupby('arah', sort=False)
+    }
+
+def travel_journey_source_hash():
+    """Content hash of the raw tracking and checkpoint snapshots."""
+    return sources_hash([TRAVEL_JOURNEY_DATA_PATH, TRAVEL_JOURNEY_JARAK_DATA_PATH])
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_speed_and_step_data(source_hash):
+    """
+    Load the checkpoint speeds and step data of all routes.
     
-    return step_data
+    Both are written next to the source snapshots the first time they are computed
+    and read back directly on later cold starts, as long as `source_hash` (see
+    `travel_journey_source_hash`) still matches the files they were built from.
+    The returned DataFrames are shared between sessions and must not be modified in place.
+    
+    Returns:
+    --------
+    tuple of pandas.DataFrame
+        (speed_df, step_data_df), see `process_all_sheets` and `build_step_data`
+    """
+    speed_df = read_derived_snapshot(TRAVEL_JOURNEY_SPEED_DATA_PATH, source_hash)
+    step_data_df = read_derived_snapshot(TRAVEL_JOURNEY_STEP_DATA_PATH, source_hash)
+    if speed_df is not None and step_data_df is not None:
+        return speed_df, step_data_df
+
+    raw_tracking_data_df = load_travel_journey_data()
+    check_point_data_df = load_travel_journey_jarak_data()
+    gmap_df = clean_raw_tracking_data(raw_tracking_data_df)
+    scaled_checkpoints_df = process_distance_sheets(check_point_data_df, gmap_df)
+    speed_df = process_all_sheets(scaled_checkpoints_df, raw_tracking_data_df)
+    step_data_df = build_step_data(speed_df)
+
+    write_derived_snapshot(speed_df, TRAVEL_JOURNEY_SPEED_DATA_PATH, source_hash)
+    write_derived_snapshot(step_data_df, TRAVEL_JOURNEY_STEP_DATA_PATH, source_hash)
+    return speed_df, step_data_df
 
 def extract_vertical_line_positions(step_data_dict):
     """
@@ -351,10 +465,45 @@ def extract_vertical_line_positions(step_data_dict):
     
     return all_x_coords
 
+def timestamp_seconds(timestamps: pd.Series) -> pd.Series:
+    """
+    Convert mixed timestamp values to seconds of the day, vectorized.
+    
+    Values are either time strings ('HH:MM:SS', possibly with a date) or Excel
+    fractions of a day. Values that cannot be parsed become NaN.
+    
+    Parameters:
+    -----------
+    timestamps : pandas.Series
+        Raw timestamp column
+        
+    Returns:
+    --------
+    pandas.Series
+        Float seconds since midnight, aligned with `timestamps`
+    """
+    as_text = timestamps.astype('string')
+    is_time = as_text.str.contains(':', regex=False).fillna(False).astype(bool)
+    
+    # Time strings, and full date-time strings for what is not a plain duration
+    seconds = pd.to_timedelta(as_text.where(is_time), errors='coerce').dt.total_seconds()
+    unparsed = is_time & seconds.isna()
+    if unparsed.any():
+        date_times = pd.to_datetime(as_text.where(unparsed), errors='coerce', format='mixed')
+        seconds = seconds.fillna((date_times - date_times.dt.normalize()).dt.total_seconds())
+    
+    # Fractions of a day, truncated to whole seconds
+    day_fraction = pd.to_numeric(timestamps.where(~is_time), errors='coerce')
+    return seconds.fillna(np.floor(day_fraction * 24 * 60 * 60)).astype(float)
+
 def convert_timestamp_column(df, timestamp_col='timestamp'):
     """
     Convert mixed timestamp formats (decimal and time strings) to consistent time format
     
+    Adds a `<timestamp_col>_seconds` column with the seconds of the day, see
+    `timestamp_seconds`, and rewrites parseable timestamps as 'HH:MM:SS'.
+    Values that cannot be parsed, and missing values, are kept as they are.
+    
     Parameters:
     -----------
     df : pandas.DataFrame
@@ -367,111 +516,99 @@ def convert_timestamp_column(df, timestamp_col='timestamp'):
     pandas.DataFrame
         DataFrame with converted timestamps
     """
-    
-    def convert_single_timestamp(timestamp_value):
-        """Convert a single timestamp value to time format"""
-        try:
-            # If it's already a string in time format (HH:MM:SS), return as is
-            if isinstance(timestamp_value, str) and ':' in str(timestamp_value):
-                return timestamp_value
-            
-            # If it's a decimal (fractional day), convert to time
-            decimal_value = float(timestamp_value)
-            
-            # Convert decimal day to total seconds
-            total_seconds = decimal_value * 24 * 60 * 60
-            
-            # Convert to hours, minutes, seconds
-            hours = int(total_seconds // 3600)
-            minutes = int((total_seconds % 3600) // 60)
-            seconds = int(total_seconds % 60)
-            
-            # Format as HH:MM:SS
-            return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-            
-        except (ValueError, TypeError):
-            # If conversion fails, return original value
-            return timestamp_value
-    
     # Create a copy to avoid modifying original
     df_converted = df.copy()
     
-    # Apply conversion to timestamp column
-    df_converted[timestamp_col] = df_converted[timestamp_col].apply(convert_single_timestamp)
+    seconds = timestamp_seconds(df_converted[timestamp_col])
+    whole_seconds = seconds.fillna(0).astype(int)
+    formatted = (
+        (whole_seconds // 3600).astype(str).str.zfill(2) + ':'
+        + (whole_seconds % 3600 // 60).astype(str).str.zfill(2) + ':'
+        + (whole_seconds % 60).astype(str).str.zfill(2)
+    )
+    timestamps = df_converted[timestamp_col].astype(object)
+    timestamps[seconds.notna()] = formatted[seconds.notna()]
+    df_converted[timestamp_col] = timestamps
+    df_converted[f'{timestamp_col}_seconds'] = seconds
     
     return df_converted
 
-def display_statistics_in_columns(direction: str, df_dir: pd.DataFrame):
+def format_time_of_day(seconds: pd.Series) -> pd.Series:
+    """Format seconds of the day as 'hh:mm:ss AM/PM' strings."""
+    return pd.to_datetime(seconds % (24 * 60 * 60), unit='s').dt.strftime("%I:%M:%S %p")
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def build_route_statistics(_df, version):
+    """
+    Precompute the statistics shown by the Travel Journey panels for every (sheet, arah) route.
+    `version` is the raw tracking data version and is the only cache key.
+    
+    Parameters:
+    -----------
+    _df : pandas.DataFrame
+        Raw tracking data with a `timestamp_seconds` column, see `convert_timestamp_column`
+    version : str
+        Version of the raw tracking data
+        
+    Returns:
+    --------
+    pandas.DataFrame
+        Indexed by (sheet, arah) with columns
+        [points, kmph_max, kmph_min, start_time, end_time, duration_hours, waktu_menit_max, jarak_km_max],
+        start/end formatted as 'hh:mm:ss AM/PM', missing for routes without timestamps
+    """
+    stats = _df.groupby(['sheet', 'arah'], sort=False).agg(
+        points=('kmph', 'size'),
+        kmph_max=('kmph', 'max'),
+        kmph_min=('kmph', 'min'),
+        start_seconds=('timestamp_seconds', 'min'),
+        end_seconds=('timestamp_seconds', 'max'),
+        start_raw=('timestamp', 'min'),
+        end_raw=('timestamp', 'max'),
+        waktu_menit_max=('waktu_menit', 'max'),
+        jarak_km_max=('jarak_km', 'max'),
+    )
+    
+    # Routes whose timestamps cannot be parsed show their raw values, missing if they have none, and no duration
+    parsed = stats['start_seconds'].notna()
+    stats['start_time'] = format_time_of_day(stats['start_seconds']).where(parsed, stats['start_raw'])
+    stats['end_time'] = format_time_of_day(stats['end_seconds']).where(parsed, stats['end_raw'])
+    stats['duration_hours'] = ((stats['end_seconds'] - stats['start_seconds']) / 3600).fillna(0.0)
+    return stats[[
+        'points', 'kmph_max', 'kmph_min', 'start_time', 'end_time', 'duration_hours', 'waktu_menit_max', 'jarak_km_max',
+    ]]
+
+def display_statistics_in_columns(direction: str, route_stats: pd.Series):
     """
     Display statistics for a given direction in a streamlit column
+    
+    `route_stats` is the row of `build_route_statistics` for this direction.
     """
     with st.container():
         st.markdown(f"**Statistik untuk {direction}**")
         col1, col2 = st.columns(2)
         
-        # Handle timestamp formatting with error handling
-        df_dir = convert_timestamp_column(df_dir)
-        try:
-            # First, check if timestamp is already in datetime format
-            if pd.api.types.is_datetime64_any_dtype(df_dir['timestamp']):
-                start_time = df_dir['timestamp'].min()
-                end_time = df_dir['timestamp'].max()
-            else:
-                # Try to convert to datetime
-                start_time = pd.to_datetime(df_dir['timestamp'].min())
-                end_time = pd.to_datetime(df_dir['timestamp'].max())
-            
-            start_time_formatted = start_time.strftime("%I:%M:%S %p")
-            end_time_formatted = end_time.strftime("%I:%M:%S %p")
-            
-            # Calculate duration in hours
-            duration = end_time - start_time
-            duration_hours = duration.total_seconds() / 3600
-            
-        except (ValueError, TypeError, pd.errors.ParserError) as e:
-            # If timestamp parsing fails, check if it's in decimal hours format
-            try:
-                start_decimal = float(df_dir['timestamp'].min())
-                end_decimal = float(df_dir['timestamp'].max())
-                
-                # Convert decimal hours to time format
-                def decimal_to_time(decimal_hours):
-                    hours = int(decimal_hours)
-                    minutes = int((decimal_hours - hours) * 60)
-                    seconds = int(((decimal_hours - hours) * 60 - minutes) * 60)
-                    
-                    # Create a datetime object for formatting
-                    import datetime
-                    time_obj = datetime.time(hours % 24, minutes, seconds)
-                    dt = datetime.datetime.combine(datetime.date.today(), time_obj)
-                    return dt.strftime("%I:%M:%S %p")
-                
-                start_time_formatted = decimal_to_time(start_decimal)
-                end_time_formatted = decimal_to_time(end_decimal)
-                duration_hours = end_decimal - start_decimal
-                
-            except (ValueError, TypeError):
-                # If all else fails, show raw values
-                start_time_formatted = str(df_dir['timestamp'].min())
-                end_time_formatted = str(df_dir['timestamp'].max())
-                duration_hours = 0.0
+        # Missing times are shown as a dash
+        start_time_formatted = None if pd.isna(route_stats['start_time']) else route_stats['start_time']
+        end_time_formatted = None if pd.isna(route_stats['end_time']) else route_stats['end_time']
+        duration_hours = route_stats['duration_hours']
         
         with col1:
             st.metric(
                 label="Jumlah titik", 
-                value=f"{len(df_dir):,}",
+                value=f"{route_stats['points']:,}",
                 help="Total jumlah titik pengukuran kecepatan yang berhasil direkam selama survei lapangan pada rute ini"
             )
             
             st.metric(
                 label="Kecepatan maksimum", 
-                value=f"{df_dir['kmph'].max()} km/jam",
+                value=f"{route_stats['kmph_max']} km/jam",
                 help="Kecepatan tertinggi yang terekam dari semua titik pengukuran selama survei di rute dan periode waktu ini"
             )
             
             st.metric(
                 label="Kecepatan minimum", 
-                value=f"{df_dir['kmph'].min()} km/jam",
+                value=f"{route_stats['kmph_min']} km/jam",
                 help="Kecepatan terendah yang terekam dari semua titik pengukuran selama survei di rute dan periode waktu ini"
             )
             
@@ -494,254 +631,142 @@ def display_statistics_in_columns(direction: str, df_dir: pd.DataFrame):
                 help="Total durasi waktu dalam jam yang dibutuhkan untuk menyelesaikan pengukuran survei pada rute dan arah ini"
             )
 
-def generate_two_route_maps(df:pd.DataFrame):
-    
-    LINE_WIDTH = 7
-    ZOOM = 9
-
-    # Get unique direction
-    direction_a_start = df[df['arah'] == 'arah A']['arah_awal'].iloc[0]
-    direction_a_end = df[df['arah'] == 'arah A']['arah_akhir'].iloc[0]
-    direction_b_start = df[df['arah'] == 'arah B']['arah_awal'].iloc[0]
-    direction_b_end = df[df['arah'] == 'arah B']['arah_akhir'].iloc[0]
-
-    # Create automated titles
-    title_a = f'Arah A ({direction_a_start} → {direction_a_end})'
-    title_b = f'Arah B ({direction_b_start} → {direction_b_end})'
-    # Create two subplots side by side
-    fig = make_subplots(
-        rows=1, cols=2,
-        subplot_titles=(title_a, title_b),
-        specs=[[{"type": "mapbox"}, {"type": "mapbox"}]],
-        horizontal_spacing=0.05
-    )
-
-    # Define speed ranges
-    speed_ranges = [
-        (0, 20, '#2F2F2F', '0-20 km/jam'),
-        (21, 40, 'red', '21-40 km/jam'),
-        (41, 60, 'orange', '41-60 km/jam'),
-        (61, float('inf'), 'blue', '61+ km/jam')
-    ]
-
-    # Function to add traces for specific direction
-    def add_direction_traces(df_direction, col_num):
-        for min_speed, max_speed, color, label in speed_ranges:
-            mask = (df_direction['kmph'] >= min_speed) & (df_direction['kmph'] <= max_speed)
-            df_range = df_direction[mask]
-
-            if not df_range.empty:
-                fig.add_trace(
-                    go.Scattermapbox(
-                        lon=df_range['x'],
-                        lat=df_range['y'],
-                        mode='markers',
-                        marker=dict(
-                            size=LINE_WIDTH,
-                            color=color,
-                            opacity=0.8
-                        ),
-                        name=label,
-                        hovertemplate=(
-                            'Kecepatan: %{text} km/jam<br>'
-                            'Waktu: %{customdata}<br>'
-                            'Lat: %{lat}<br>'
-                            'Lon: %{lon}'
-                            '<extra></extra>'
-                        ),
-                        text=df_range['kmph'],
-                        customdata=df_range['timestamp'],
-                        showlegend=(col_num == 1) # Show legend only for first subplot
-                    ),
-                    row=1, col=col_num
-                )
-    
-    # Split data by direction
-    df_a = df[df['arah'] == 'arah A']
-    df_b = df[df['arah'] == 'arah B']
+# Speed classes of the route maps, bins are (low, high] except the first one which includes 0
+SPEED_CLASS_BINS = [0, 20, 40, 60, float('inf')]
+SPEED_CLASS_COLORS = ['#2F2F2F', 'red', 'orange', 'blue']
+SPEED_CLASS_LABELS = ['0-20 km/jam', '21-40 km/jam', '41-60 km/jam', '61+ km/jam']
 
-    # Calculate centers for each direction
-    center_a = dict(lat=df_a['y'].mean(), lon=df_a['x'].mean())
-    center_b = dict(lat=df_b['y'].mean(), lon=df_b['x'].mean())
+def split_direction_period(arah: str):
+    """Split an arah value such as 'arah A - AM' into ('arah A', 'AM'), or ('arah A', None) without period."""
+    direction, _, period = arah.partition(' - ')
+    return direction, period or None
 
-    # Add traces for each direction
-    add_direction_traces(df_a, 1)
-    add_direction_traces(df_b, 2)
-
-    # Update layout
-    fig.update_layout(
-        mapbox1=dict(
-            style='carto-positron',
-            center=center_a,
-            zoom=ZOOM
-        ),
-        mapbox2=dict(
-            style='carto-positron',
-            center=center_b,
-            zoom=ZOOM
-        ),
-        margin=dict(l=0, r=0, t=30, b=0),
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.1,
-            xanchor="center",
-            x=0.5,
-            bgcolor="rgba(255, 255, 255, 0.8)",
-            bordercolor="rgba(0, 0, 0, 0.2)",
-            borderwidth=1
-        ),
-        legend_font_color='black',
-        height=500,
-        width=1600,
-        # title='Peta Rute'
-    )
+def downsample_line(df: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """
+    Keep at most `max_points` points of one time vs. distance line, selected with LTTB
+    on (jarak_km, waktu_menit) so the shape of the line is preserved.
+    """
+    return df.iloc[lttb_indices(df['jarak_km'], df['waktu_menit'], max_points)]
 
-    st.subheader('Peta Rute')
-    st.info("💡 **Tips Navigasi:** Hover pada peta untuk melihat detail kecepatan. Gunakan toolbar di pojok kanan atas peta untuk zoom dan navigasi pada semua peta.")
-    st.plotly_chart(fig, use_container_width=True)
+def downsample_route_points(df: pd.DataFrame, speed_class: pd.Series, max_points: int) -> pd.DataFrame:
+    """
+    Keep at most `max_points` GPS points per arah, selected with Douglas-Peucker on (x, y)
+    so the path keeps its shape. The first point of every run of the same speed class
+    (points without a class form runs too) is kept as well, so the colored segments of
+    the map do not move; if there are more runs than half the budget, an evenly spaced
+    subset of them is kept instead.
+    """
+    # Class codes, -1 for points without a class so they compare equal to each other
+    class_codes = pd.Series(speed_class).fillna(-1).to_numpy()
+    kept = []
+    for positions in df.groupby('arah', sort=False).indices.values():
+        route_class = class_codes[positions]
+        run_starts = np.flatnonzero(route_class[1:] != route_class[:-1]) + 1
+        max_forced = max_points // 2
+        if len(run_starts) > max_forced:
+            run_starts = run_starts[np.linspace(0, len(run_starts) - 1, max_forced).astype(int)]
+        keep = np.zeros(len(positions), dtype=bool)
+        keep[run_starts] = True
+        selected = douglas_peucker_indices(
+            df['x'].to_numpy()[positions], df['y'].to_numpy()[positions], max_points - len(run_starts), keep=keep
+        )
+        kept.append(positions[selected])
+    kept = np.sort(np.concatenate(kept)) if kept else np.array([], dtype=int)
+    return df.iloc[kept]
 
-    # Write some statistics for each direction
-    # Display statistics in columns
-    col1, col2 = st.columns(2)
+def generate_route_maps(df: pd.DataFrame, route_stats: pd.DataFrame, full_resolution=False):
+    """
+    Display the route maps of one sheet, one panel per direction (columns) and period (rows),
+    followed by the statistics of every panel.
     
-    with col1:
-        with st.container(border=True):
-            display_statistics_in_columns(title_a, df_a)
+    Points are colored by speed class, assigned for the whole sheet in one `pd.cut` pass,
+    with one trace per speed class per panel.
     
-    with col2:
-        with st.container(border=True):
-            display_statistics_in_columns(title_b, df_b)
-
-def generate_four_route_maps(df: pd.DataFrame):
-
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Raw tracking data of one sheet, arah is 'arah A'/'arah B' optionally followed by ' - <period>'
+    route_stats : pandas.DataFrame
+        Statistics per (sheet, arah), see `build_route_statistics`
+    full_resolution : bool
+        Draw every GPS point instead of a Douglas-Peucker simplification of each path
+    """
     LINE_WIDTH = 7
-    ZOOM = 11
 
-    # Get unique directions and create titles
-    directions = {
-        'AM': {
-            'A': df[df['arah'] == 'arah A - AM'],
-            'B': df[df['arah'] == 'arah B - AM']
-        },
-        'PM': {
-            'A': df[df['arah'] == 'arah A - PM'],
-            'B': df[df['arah'] == 'arah B - PM']
-        }
-    }
-    
-    # Create titles for each subplot
+    # Panels are laid out with one row per period and one column per direction
+    direction_periods = [split_direction_period(arah) for arah in df['arah'].unique()]
+    directions = sorted({direction for direction, _ in direction_periods})
+    periods = sorted({period for _, period in direction_periods if period is not None}) or [None]
+    ZOOM = 9 if periods == [None] else 11
+
+    first_rows = df.drop_duplicates('arah').set_index('arah')
+    positions = {}
     titles = {}
-    for period in ['AM', 'PM']:
-        for direction in ['A', 'B']:
-            df_dir = directions[period][direction]
-            if not df_dir.empty:
-                start = df_dir['arah_awal'].iloc[0]
-                end = df_dir['arah_akhir'].iloc[0]
-                titles[f'{direction}_{period}'] = f'Arah {direction} - {period} ({start} → {end})'
-
-    # Create four subplots in a 2x2 grid
+    for row, period in enumerate(periods, 1):
+        for col, direction in enumerate(directions, 1):
+            arah = direction if period is None else f'{direction} - {period}'
+            positions[arah] = (row, col)
+            if arah in first_rows.index:
+                label = direction.replace('arah', 'Arah') + ('' if period is None else f' - {period}')
+                titles[arah] = f"{label} ({first_rows.loc[arah, 'arah_awal']} → {first_rows.loc[arah, 'arah_akhir']})"
+
     fig = make_subplots(
-        rows=2, cols=2,
-        subplot_titles=(
-            titles['A_AM'], titles['B_AM'],
-            titles['A_PM'], titles['B_PM']
-        ),
-        specs=[[{"type": "mapbox"}, {"type": "mapbox"}],
-               [{"type": "mapbox"}, {"type": "mapbox"}]],
+        rows=len(periods), cols=len(directions),
+        subplot_titles=[titles.get(arah, '') for arah in positions],
+        specs=[[{"type": "mapbox"}] * len(directions) for _ in periods],
         vertical_spacing=0.1,
         horizontal_spacing=0.05
     )
 
-    # Define speed ranges
-    speed_ranges = [
-        (0, 20, '#2F2F2F', '0-20 km/jam'),
-        (21, 40, 'red', '21-40 km/jam'),
-        (41, 60, 'orange', '41-60 km/jam'),
-        (61, float('inf'), 'blue', '61+ km/jam')
-    ]
-
-    # Function to add traces for specific direction
-    def add_direction_traces(df_direction, row, col, is_first=False):
-        for min_speed, max_speed, color, label in speed_ranges:
-            mask = (df_direction['kmph'] >= min_speed) & (df_direction['kmph'] <= max_speed)
-            df_range = df_direction[mask]
-
-            if not df_range.empty:
-                fig.add_trace(
-                    go.Scattermapbox(
-                        lon=df_range['x'],
-                        lat=df_range['y'],
-                        mode='markers',
-                        marker=dict(
-                            size=LINE_WIDTH,
-                            color=color,
-                            opacity=0.8
-                        ),
-                        name=label,
-                        hovertemplate=(
-                            'Kecepatan: %{text} km/jam<br>'
-                            'Waktu: %{customdata}<br>'
-                            'Lat: %{lat}<br>'
-                            'Lon: %{lon}'
-                            '<extra></extra>'
-                        ),
-                        text=df_range['kmph'],
-                        customdata=df_range['timestamp'],
-                        showlegend=is_first  # Show legend only for first subplot
-                    ),
-                    row=row, col=col
-                )
-
-    # Add traces for each direction and time period
-    subplot_positions = {
-        ('A', 'AM'): (1, 1),
-        ('B', 'AM'): (1, 2),
-        ('A', 'PM'): (2, 1),
-        ('B', 'PM'): (2, 2)
-    }
-
-    # Calculate centers for each subplot
-    centers = {}
-    for period in ['AM', 'PM']:
-        for direction in ['A', 'B']:
-            df_dir = directions[period][direction]
-            if not df_dir.empty:
-                centers[f'{direction}_{period}'] = dict(
-                    lat=df_dir['y'].mean(),
-                    lon=df_dir['x'].mean()
-                )
+    speed_class = pd.cut(df['kmph'], bins=SPEED_CLASS_BINS, labels=False, include_lowest=True)
+    df_map = df
+    if not full_resolution:
+        # Higher zoom shows more detail per panel
+        df_map = downsample_route_points(df, speed_class, int(ROUTE_MAP_POINTS_PER_PANEL * 2 ** ((ZOOM - 9) / 2)))
+        speed_class = speed_class.loc[df_map.index]
+    legend_arah = next(arah for arah in positions if arah in titles)
+    for (arah, class_idx), df_range in df_map.groupby([df_map['arah'], speed_class], sort=True):
+        if arah not in positions:
+            continue
+        row, col = positions[arah]
+        fig.add_trace(
+            go.Scattermapbox(
+                lon=df_range['x'],
+                lat=df_range['y'],
+                mode='markers',
+                marker=dict(
+                    size=LINE_WIDTH,
+                    color=SPEED_CLASS_COLORS[int(class_idx)],
+                    opacity=0.8
+                ),
+                name=SPEED_CLASS_LABELS[int(class_idx)],
+                hovertemplate=(
+                    'Kecepatan: %{text} km/jam<br>'
+                    'Waktu: %{customdata}<br>'
+                    'Lat: %{lat}<br>'
+                    'Lon: %{lon}'
+                    '<extra></extra>'
+                ),
+                text=df_range['kmph'],
+                customdata=df_range['timestamp'],
+                showlegend=(arah == legend_arah)  # Show legend only for the first panel
+            ),
+            row=row, col=col
+        )
 
-    # Add all traces
-    is_first = True
-    for (direction, period), (row, col) in subplot_positions.items():
-        df_dir = directions[period][direction]
+    # Center every panel on its own points
+    mapboxes = {}
+    for i, arah in enumerate(positions, 1):
+        df_dir = df[df['arah'] == arah]
         if not df_dir.empty:
-            add_direction_traces(df_dir, row, col, is_first)
-            is_first = False
+            mapboxes['mapbox' if i == 1 else f'mapbox{i}'] = dict(
+                style='carto-positron',
+                center=dict(lat=df_dir['y'].mean(), lon=df_dir['x'].mean()),
+                zoom=ZOOM
+            )
 
-    # Update layout with four mapboxes
     fig.update_layout(
-        mapbox1=dict(
-            style='carto-positron',
-            center=centers['A_AM'],
-            zoom=ZOOM
-        ),
-        mapbox2=dict(
-            style='carto-positron',
-            center=centers['B_AM'],
-            zoom=ZOOM
-        ),
-        mapbox3=dict(
-            style='carto-positron',
-            center=centers['A_PM'],
-            zoom=ZOOM
-        ),
-        mapbox4=dict(
-            style='carto-positron',
-            center=centers['B_PM'],
-            zoom=ZOOM
-        ),
+        **mapboxes,
         margin=dict(l=0, r=0, t=30, b=0),
         legend=dict(
             orientation="h",
@@ -754,41 +779,27 @@ def generate_four_route_maps(df: pd.DataFrame):
             borderwidth=1
         ),
         legend_font_color='black',
-        height=800,  # Increased height to accommodate 2x2 grid
+        height=500 if len(periods) == 1 else 400 * len(periods),
         width=1600,
         # title='Peta Rute'
     )
+
     st.subheader('Peta Rute')
     st.info("💡 **Tips Navigasi:** Hover pada peta untuk melihat detail kecepatan. Gunakan toolbar di pojok kanan atas peta untuk zoom dan navigasi pada semua peta.")
     st.plotly_chart(fig, use_container_width=True)
 
-    # Display statistics in a 2x2 grid
-    col1, col2 = st.columns(2)
-
-    # Write statistics for each direction and time period
-    with col1:
-        for direction in ['A']:
-            for period in ['AM', 'PM']:
-                df_dir = directions[period][direction]
-                if not df_dir.empty:
-                    with st.container(border=True):
-                        display_statistics_in_columns(
-                            titles[f'{direction}_{period}'],
-                            df_dir
-                        )
-    
-    with col2:
-        for direction in ['B']:
-            for period in ['AM', 'PM']:
-                df_dir = directions[period][direction]
-                if not df_dir.empty:
+    # Display statistics, one column per direction and one box per period
+    sheet = df['sheet'].iloc[0]
+    cols = st.columns(len(directions))
+    for col, direction in zip(cols, directions):
+        with col:
+            for period in periods:
+                arah = direction if period is None else f'{direction} - {period}'
+                if arah in titles:
                     with st.container(border=True):
-                        display_statistics_in_columns(
-                            titles[f'{direction}_{period}'],
-                            df_dir
-                        )
+                        display_statistics_in_columns(titles[arah], route_stats.loc[(sheet, arah)])
 
-def generate_linechart_two_directions(df: pd.DataFrame, step_data_dict=None):
+def generate_linechart_two_directions(df: pd.DataFrame, route_stats: pd.DataFrame, step_data_dict=None, full_resolution=False):
     """
     Generate line chart with optional numbered vertical lines from step data transitions
     FIXED VERSION: Forces chart to show full step data range even if line data is shorter
@@ -797,22 +808,29 @@ def generate_linechart_two_directions(df: pd.DataFrame, step_data_dict=None):
     -----------
     df : pd.DataFrame
         DataFrame containing travel time data
+    route_stats : pd.DataFrame
+        Statistics per (sheet, arah), see `build_route_statistics`
     step_data_dict : dict, optional
         Dictionary containing step data for extracting vertical line positions.
         Will add numbered vertical lines at 0 km, transition points, and end point.
         Chart range will be forced to include all step data points.
+    full_resolution : bool
+        Draw every GPS point instead of an LTTB selection of LINECHART_POINTS_PER_LINE points per line
     """
     # Create separate dataframes for each direction
-    df_a = df[df['arah']== 'arah A'].copy()
-    df_b = df[df['arah']== 'arah B'].copy()
+    df_a = df[df['arah']== 'arah A']
+    df_b = df[df['arah']== 'arah B']
+    sheet = df['sheet'].iloc[0]
+    stats_a = route_stats.loc[(sheet, 'arah A')]
+    stats_b = route_stats.loc[(sheet, 'arah B')]
 
     # Get direction names from the first row of each dataframe
     direction_a_name = f"arah A ({df_a['arah_awal'].iloc[0]} → {df_a['arah_akhir'].iloc[0]})"
     direction_b_name = f"arah B ({df_b['arah_awal'].iloc[0]} → {df_b['arah_akhir'].iloc[0]})"
 
-    # Create custom hover text
-    df_a['hover_text'] = df_a.apply(lambda row: f'Waktu: {row["waktu_menit"]:.1f} menit<br>Jarak: {row["jarak_km"]:.2f} km', axis=1)
-    df_b['hover_text'] = df_b.apply(lambda row: f'Waktu: {row["waktu_menit"]:.1f} menit<br>Jarak: {row["jarak_km"]:.2f} km', axis=1)
+    # Points drawn on the chart, statistics below come from the route statistics table
+    df_a_line = df_a if full_resolution else downsample_line(df_a, LINECHART_POINTS_PER_LINE)
+    df_b_line = df_b if full_resolution else downsample_line(df_b, LINECHART_POINTS_PER_LINE)
 
     # Create the figure
     fig = go.Figure()
@@ -820,12 +838,11 @@ def generate_linechart_two_directions(df: pd.DataFrame, step_data_dict=None):
     # Add traces for Direction A (using x-axis at the bottom)
     fig.add_trace(
         go.Scatter(
-            x=df_a['jarak_km'],
-            y=df_a['waktu_menit'],
+            x=df_a_line['jarak_km'],
+            y=df_a_line['waktu_menit'],
             name=direction_a_name,
             line=dict(color='rgb(44, 160, 44)', width=2),  # Green color
-            hovertext=df_a['hover_text'],
-            hoverinfo='text',
+            hovertemplate=LINECHART_HOVERTEMPLATE,
             xaxis='x'
         )
     )
@@ -833,12 +850,11 @@ def generate_linechart_two_directions(df: pd.DataFrame, step_data_dict=None):
     # Add traces for Direction B (using secondary x-axis at the top)
     fig.add_trace(
         go.Scatter(
-            x=df_b['jarak_km'],
-            y=df_b['waktu_menit'],
+            x=df_b_line['jarak_km'],
+            y=df_b_line['waktu_menit'],
             name=direction_b_name,
             line=dict(color='rgb(255, 127, 14)', width=2),  # Orange color
-            hovertext=df_b['hover_text'],
-            hoverinfo='text',
+            hovertemplate=LINECHART_HOVERTEMPLATE,
             xaxis='x2'
         )
     )
@@ -982,13 +998,13 @@ def generate_linechart_two_directions(df: pd.DataFrame, step_data_dict=None):
                     
                     st.metric(
                         label="Waktu Maksimum",
-                        value=f"{df_a['waktu_menit'].max():.1f} menit",
+                        value=f"{stats_a['waktu_menit_max']:.1f} menit",
                         help="Waktu perjalanan maksimum yang dibutuhkan untuk menempuh seluruh rute pada arah ini berdasarkan data survei lapangan"
                     )
                     
                     st.metric(
                         label="Jarak Total",
-                        value=f"{df_a['jarak_km'].max():.2f} km",
+                        value=f"{stats_a['jarak_km_max']:.2f} km",
                         help="Total jarak keseluruhan rute dari titik awal hingga titik akhir berdasarkan hasil pengukuran survei"
                     )
 
@@ -999,17 +1015,17 @@ def generate_linechart_two_directions(df: pd.DataFrame, step_data_dict=None):
                     
                     st.metric(
                         label="Waktu Maksimum",
-                        value=f"{df_b['waktu_menit'].max():.1f} menit",
+                        value=f"{stats_b['waktu_menit_max']:.1f} menit",
                         help="Waktu perjalanan maksimum yang dibutuhkan untuk menempuh seluruh rute pada arah ini berdasarkan data survei lapangan"
                     )
                     
                     st.metric(
                         label="Jarak Total",
-                        value=f"{df_b['jarak_km'].max():.2f} km",
+                        value=f"{stats_b['jarak_km_max']:.2f} km",
                         help="Total jarak keseluruhan rute dari titik awal hingga titik akhir berdasarkan hasil pengukuran survei"
                     )
 
-def generate_linechart_four_directions(df: pd.DataFrame, step_data_dict=None):
+def generate_linechart_four_directions(df: pd.DataFrame, route_stats: pd.DataFrame, step_data_dict=None, full_resolution=False):
     """
     Generate line chart for four directions with optional numbered vertical lines from step data transitions
     FIXED VERSION: Forces chart to show full step data range even if line data is shorter
@@ -1018,16 +1034,20 @@ def generate_linechart_four_directions(df: pd.DataFrame, step_data_dict=None):
     -----------
     df : pd.DataFrame
         DataFrame containing travel time data for four directions
+    route_stats : pd.DataFrame
+        Statistics per (sheet, arah), see `build_route_statistics`
     step_data_dict : dict, optional
         Dictionary containing step data for extracting vertical line positions.
         Will add numbered vertical lines at 0 km, transition points, and end point.
         Chart range will be forced to include all step data points.
+    full_resolution : bool
+        Draw every GPS point instead of an LTTB selection of LINECHART_POINTS_PER_LINE points per line
     """
     # Create separate dataframes for each direction
-    df_a_am = df[df['arah'] == 'arah A - AM'].copy()
-    df_a_pm = df[df['arah'] == 'arah A - PM'].copy()
-    df_b_am = df[df['arah'] == 'arah B - AM'].copy()
-    df_b_pm = df[df['arah'] == 'arah B - PM'].copy()
+    df_a_am = df[df['arah'] == 'arah A - AM']
+    df_a_pm = df[df['arah'] == 'arah A - PM']
+    df_b_am = df[df['arah'] == 'arah B - AM']
+    df_b_pm = df[df['arah'] == 'arah B - PM']
 
     # Get direction names from the first row of each dataframe
     def get_direction_name(direction_df):
@@ -1036,12 +1056,11 @@ def generate_linechart_four_directions(df: pd.DataFrame, step_data_dict=None):
             return f"{arah_full} ({direction_df['arah_awal'].iloc[0]} → {direction_df['arah_akhir'].iloc[0]})"
         return "No data"
 
-    # Create custom hover text for each direction
-    for direction_df in [df_a_am, df_a_pm, df_b_am, df_b_pm]:
-        direction_df['hover_text'] = direction_df.apply(
-            lambda row: f'Waktu: {row["waktu_menit"]:.1f} menit<br>Jarak: {row["jarak_km"]:.2f} km', 
-            axis=1
-        )
+    # Points drawn on the chart, statistics below come from the route statistics table
+    line_dfs = {
+        arah: direction_df if full_resolution else downsample_line(direction_df, LINECHART_POINTS_PER_LINE)
+        for arah, direction_df in [('arah A - AM', df_a_am), ('arah A - PM', df_a_pm), ('arah B - AM', df_b_am), ('arah B - PM', df_b_pm)]
+    }
 
     # Create the figure
     fig = go.Figure()
@@ -1049,28 +1068,28 @@ def generate_linechart_four_directions(df: pd.DataFrame, step_data_dict=None):
     # Define trace configurations
     traces = [
         {
-            'df': df_a_am,
+            'df': line_dfs['arah A - AM'],
             'name': get_direction_name(df_a_am),
             'color': 'rgb(44, 160, 44)',  # Green
             'dash': 'solid',
             'xaxis': 'x'
         },
         {
-            'df': df_a_pm,
+            'df': line_dfs['arah A - PM'],
             'name': get_direction_name(df_a_pm),
             'color': 'rgb(44, 160, 44)',  # Green
             'dash': 'dot',
             'xaxis': 'x'
         },
         {
-            'df': df_b_am,
+            'df': line_dfs['arah B - AM'],
             'name': get_direction_name(df_b_am),
             'color': 'rgb(255, 127, 14)',  # Orange
             'dash': 'solid',
             'xaxis': 'x2'
         },
         {
-            'df': df_b_pm,
+            'df': line_dfs['arah B - PM'],
             'name': get_direction_name(df_b_pm),
             'color': 'rgb(255, 127, 14)',  # Orange
             'dash': 'dot',
@@ -1090,8 +1109,7 @@ def generate_linechart_four_directions(df: pd.DataFrame, step_data_dict=None):
                     width=2,
                     dash=trace['dash']
                 ),
-                hovertext=trace['df']['hover_text'],
-                hoverinfo='text',
+                hovertemplate=LINECHART_HOVERTEMPLATE,
                 xaxis=trace['xaxis']
             )
         )
@@ -1246,17 +1264,18 @@ def generate_linechart_four_directions(df: pd.DataFrame, step_data_dict=None):
                 with cols[col_idx]:
                     with st.container(border=True):
                         direction = direction_df['arah'].iloc[0]
+                        direction_stats = route_stats.loc[(direction_df['sheet'].iloc[0], direction)]
                         st.markdown(f"**{direction_names[direction]}**")
                         
                         st.metric(
                             label="Waktu Maksimum",
-                            value=f"{direction_df['waktu_menit'].max():.1f} menit",
+                            value=f"{direction_stats['waktu_menit_max']:.1f} menit",
                             help="Waktu perjalanan maksimum yang dibutuhkan untuk menempuh seluruh rute pada arah dan periode waktu ini berdasarkan data survei lapangan"
                         )
                         
                         st.metric(
                             label="Jarak Total",
-                            value=f"{direction_df['jarak_km'].max():.2f} km",
+                            value=f"{direction_stats['jarak_km_max']:.2f} km",
                             help="Total jarak keseluruhan rute dari titik awal hingga titik akhir berdasarkan hasil pengukuran survei"
                         )
 
@@ -1474,31 +1493,32 @@ def get_route_type(df: pd.DataFrame) -> str:
     unique_directions = df['arah'].unique()
     return 'four' if any('AM' in direction or 'PM' in direction for direction in unique_directions) else 'two'
 
-def generate_travel_journey_dashboard(df: pd.DataFrame, speed_df: pd.DataFrame, selected_route: str):
+def generate_travel_journey_dashboard(df: pd.DataFrame, step_data_df: pd.DataFrame, route_stats: pd.DataFrame, selected_route: str):
     """
     Generate the dashboard for the selected route, automatically choosing
     between two or four direction maps based on the data structure.
     """
     # Filter data for selected route
     selected_df = df[df['sheet'] == selected_route]
-    selected_speed_df = speed_df[speed_df['sheet'] == selected_route]
-    step_dict = create_step_data_for_sheet(selected_speed_df)
+    step_dict = get_step_data_for_sheet(step_data_df, selected_route)
 
-    # Determine route type and generate appropriate map
-    route_type = get_route_type(selected_df)
+    full_resolution = st.toggle(
+        "Resolusi penuh",
+        value=False,
+        help="Tampilkan semua titik GPS pada peta dan grafik waktu perjalanan. Secara default titik disederhanakan tanpa mengubah bentuk rute dan perubahan kecepatan."
+    )
 
-    
+    generate_route_maps(selected_df, route_stats, full_resolution=full_resolution)
+    st.write("---")
+
+    # Determine route type and generate appropriate charts
+    route_type = get_route_type(selected_df)
     if route_type == 'two':
-        pass
-        generate_two_route_maps(selected_df)
-        st.write("---")
-        generate_linechart_two_directions(selected_df, step_data_dict=step_dict)
+        generate_linechart_two_directions(selected_df, route_stats, step_data_dict=step_dict, full_resolution=full_resolution)
         st.write("---")
         generate_stepchart_two_directions(step_dict)
     else:  # route_type == 'four'
-        generate_four_route_maps(selected_df)
-        st.write("---")
-        generate_linechart_four_directions(selected_df, step_data_dict=step_dict)
+        generate_linechart_four_directions(selected_df, route_stats, step_data_dict=step_dict, full_resolution=full_resolution)
         st.write("---")
         generate_stepchart_four_directions(step_dict)
         pass
@@ -1514,11 +1534,8 @@ def generate_travel_journey_dashboard(df: pd.DataFrame, speed_df: pd.DataFrame,
 def show_travel_journey():
     # Load and process data
     travel_journey_df = load_travel_journey_data()
-    raw_tracking_data_df = travel_journey_df.copy()
-    check_point_data_df = load_travel_journey_jarak_data()
-    gmap_df = clean_raw_tracking_data(raw_tracking_data_df)
-    scaled_checkpoints_df = process_distance_sheets(check_point_data_df, gmap_df)
-    speed_df = process_all_sheets(scaled_checkpoints_df, raw_tracking_data_df)
+    speed_df, step_data_df = load_speed_and_step_data(travel_journey_source_hash())
+    route_stats = build_route_statistics(travel_journey_df, snapshot_version(TRAVEL_JOURNEY_DATA_PATH))
 
 
     # Create a mapping of sheet names to their display labels
@@ -1542,4 +1559,13 @@ def show_travel_journey():
     )
 
     # Generate dashboard
-    generate_travel_journey_dashboard(travel_journey_df, speed_df, selected_route)
+    generate_travel_journey_dashboard(travel_journey_df, step_data_df, route_stats, selected_route)
+
+    # Export the statistics of every route shown by the panels above
+    st.download_button(
+        "Unduh Statistik Rute (CSV)",
+        data=route_stats.reset_index().to_csv(index=False).encode('utf-8'),
+        file_name="statistik_rute_travel_journey.csv",
+        mime="text/csv",
+        help="Statistik seluruh rute dan arah yang ditampilkan pada dashboard"
+    )
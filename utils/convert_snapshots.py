@@ -0,0 +1,58 @@
+"""
+Convert the dashboard's pickle/feather snapshots in data/ to uncompressed Arrow IPC.
+
+Uncompressed Arrow IPC files can be memory-mapped and read column by column
+(see utils.snapshot.read_snapshot_file), so a tab only touches the columns it
+renders and several Streamlit workers share the same page-cache pages.
+
+Usage:
+    python -m utils.convert_snapshots                 # convert every snapshot in SNAPSHOTS
+    python -m utils.convert_snapshots data/x.pkl ...  # convert the given files
+"""
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+
+# Snapshots read by the dashboard
+SNAPSHOTS = [
+    "data/fetch_base_data_tc.pkl",
+    "data/fetch_stats_data_tc.pkl",
+    "data/origin_destination_agg.pkl",
+    "data/origin_destination_vehicle_type_.pkl",
+    "data/survey_travel_journey.feather",
+    "data/survey_travel_journey_jarak.feather",
+]
+
+
+def convert_snapshot(path: str) -> str:
+    """
+    Write `path` as an uncompressed Arrow IPC file next to it and return the new path.
+    """
+    if path.endswith(".feather"):
+        table = feather.read_table(path)
+    else:
+        table = pa.Table.from_pandas(pd.read_pickle(path), preserve_index=False)
+
+    target = os.path.splitext(path)[0] + ".arrow"
+    # Write to a temporary file first so running dashboards never see a partial file
+    tmp_target = target + ".tmp"
+    feather.write_feather(table, tmp_target, compression="uncompressed")
+    os.replace(tmp_target, target)
+    return target
+
+
+def main(paths):
+    for path in paths or SNAPSHOTS:
+        if not os.path.exists(path):
+            print(f"Warning: {path} not found, skipped")
+            continue
+        target = convert_snapshot(path)
+        print(f"{path} -> {target} ({os.path.getsize(target) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+
+def grid_density(lon, lat, bins=10):
+    """
+    Return, for every point, the number of points falling in its cell of a regular grid.
+
+    The grid spans the bounding box of the points with `bins` edges per axis, and
+    every point is assigned to its cell in one vectorized call per axis.
+
+    Parameters:
+    -----------
+    lon : array-like
+        Longitudes of the points
+    lat : array-like
+        Latitudes of the points
+    bins : int
+        Number of grid edges per axis, the grid has (bins - 1) x (bins - 1) cells
+
+    Returns:
+    --------
+    numpy.ndarray
+        Point count of the cell each point falls in, aligned with `lon`/`lat`
+    """
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    if len(lon) == 0:
+        return np.zeros(0)
+
+    x_bins = np.linspace(lon.min(), lon.max(), bins)
+    y_bins = np.linspace(lat.min(), lat.max(), bins)
+    hist, x_edges, y_edges = np.histogram2d(lon, lat, bins=[x_bins, y_bins])
+
+    x_bin = np.clip(np.digitize(lon, x_edges) - 1, 0, hist.shape[0] - 1)
+    y_bin = np.clip(np.digitize(lat, y_edges) - 1, 0, hist.shape[1] - 1)
+    return hist[x_bin, y_bin]
+
+
+def density_frame(lon, lat, bins=10):
+    """
+    Build the [latitude, longitude, keterangan] frame plotted by the density maps.
+
+    Parameters:
+    -----------
+    lon : array-like
+        Longitudes of the points
+    lat : array-like
+        Latitudes of the points
+    bins : int
+        Number of grid edges per axis, see `grid_density`
+
+    Returns:
+    --------
+    pandas.DataFrame
+        One row per point, `keterangan` holds the point count of its grid cell
+    """
+    return pd.DataFrame({
+        'latitude': np.asarray(lat, dtype=float),
+        'longitude': np.asarray(lon, dtype=float),
+        'keterangan': grid_density(lon, lat, bins=bins),
+    })
@@ -0,0 +1,115 @@
+import heapq
+
+import numpy as np
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Select the points of a line to keep with Largest-Triangle-Three-Buckets.
+
+    LTTB keeps the visual shape of a line chart: the first and last points are
+    always kept, and from every bucket in between the point forming the largest
+    triangle with the previously kept point and the average of the next bucket.
+
+    Parameters:
+    -----------
+    x : array-like
+        X values, sorted ascending
+    y : array-like
+        Y values
+    n_out : int
+        Number of points to keep
+
+    Returns:
+    --------
+    numpy.ndarray
+        Sorted positions of the kept points, all positions if the line has at most `n_out` points
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Bucket edges over the points between the first and the last one
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    kept = np.empty(n_out, dtype=int)
+    kept[0] = 0
+    kept[-1] = n - 1
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        prev = kept[i]
+        areas = np.abs(
+            (x[prev] - next_x) * (y[start:end] - y[prev]) - (x[prev] - x[start:end]) * (next_y - y[prev])
+        )
+        kept[i + 1] = start + int(np.nanargmax(areas)) if np.isfinite(areas).any() else start
+    return kept
+
+
+def _farthest_point(x, y, start, end):
+    """Return (distance, position) of the point of x/y[start:end] farthest from the start-end chord."""
+    dx, dy = x[end] - x[start], y[end] - y[start]
+    seg_x, seg_y = x[start + 1:end] - x[start], y[start + 1:end] - y[start]
+    norm = np.hypot(dx, dy)
+    if norm == 0:
+        distances = np.hypot(seg_x, seg_y)
+    else:
+        distances = np.abs(dx * seg_y - dy * seg_x) / norm
+    i = int(np.argmax(distances))
+    return distances[i], start + 1 + i
+
+
+def douglas_peucker_indices(x, y, n_out, keep=None):
+    """
+    Select the points of a path to keep with Douglas-Peucker, targeting `n_out` points.
+
+    Segments are split in order of decreasing distance (the farthest point of any
+    segment first) until `n_out` points are selected, which is the Douglas-Peucker
+    simplification with the smallest tolerance giving at most `n_out` points. Only
+    the selected segments are scanned, so the cost depends on `n_out`, not on the
+    full recursion over the path.
+
+    Parameters:
+    -----------
+    x : array-like
+        X coordinates of the path (e.g. longitude)
+    y : array-like
+        Y coordinates of the path (e.g. latitude)
+    n_out : int
+        Number of points selected by Douglas-Peucker, including the first and last points
+    keep : array-like of bool, optional
+        Points that are kept in addition to the selected ones, e.g. where the speed class changes
+
+    Returns:
+    --------
+    numpy.ndarray
+        Sorted positions of the kept points, all positions if the path has at most `n_out` points
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+
+    selected = [0, n - 1][:max(n_out, 0)]
+    # Max-heap of splittable segments, keyed on the distance of their farthest point
+    heap = []
+    if n > 2:
+        distance, split = _farthest_point(x, y, 0, n - 1)
+        heap.append((-distance, 0, n - 1, split))
+    while heap and len(selected) < n_out:
+        _, start, end, split = heapq.heappop(heap)
+        selected.append(split)
+        for seg_start, seg_end in ((start, split), (split, end)):
+            if seg_end - seg_start >= 2:
+                distance, seg_split = _farthest_point(x, y, seg_start, seg_end)
+                heapq.heappush(heap, (-distance, seg_start, seg_end, seg_split))
+
+    selected = np.array(selected, dtype=int)
+    if keep is not None:
+        selected = np.union1d(selected, np.flatnonzero(np.asarray(keep, dtype=bool)))
+    return np.unique(selected)
@@ -0,0 +1,89 @@
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+import streamlit as st
+
+
+# Default memory budget of the figure cache, override with FIGURE_CACHE_MAX_BYTES
+DEFAULT_FIGURE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class FigureCache:
+    """
+    LRU cache of serialized Plotly figures, bounded by a memory budget in bytes.
+
+    Figures are stored as JSON strings and returned as plain dicts, which
+    st.plotly_chart accepts directly. The least recently used figures are
+    evicted once the stored JSON exceeds `max_bytes`.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_FIGURE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """Memory currently used by the stored figures, in bytes."""
+        return self._size
+
+    def get(self, key):
+        """Return the cached figure dict for `key`, or None if it is not cached."""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                return None
+            self._entries.move_to_end(key)
+        return json.loads(payload)
+
+    def put(self, key, fig):
+        """
+        Serialize and store `fig` under `key`, evicting old figures to stay within budget.
+
+        Returns the JSON payload, also when the figure is too large to be stored.
+        """
+        payload = pio.to_json(fig, validate=False)
+        payload_size = sys.getsizeof(payload)
+        if payload_size > self.max_bytes:
+            return payload
+
+        with self._lock:
+            old_payload = self._entries.pop(key, None)
+            if old_payload is not None:
+                self._size -= sys.getsizeof(old_payload)
+            self._entries[key] = payload
+            self._size += payload_size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= sys.getsizeof(evicted)
+        return payload
+
+    def get_or_create(self, key, build):
+        """
+        Return the cached figure dict for `key`, building and caching it with `build()` on a miss.
+
+        A freshly built figure is returned decoded from its stored JSON, so hits and misses return the same type.
+        """
+        fig = self.get(key)
+        if fig is None:
+            fig = json.loads(self.put(key, build()))
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+@st.cache_resource(show_spinner=False)
+def get_figure_cache():
+    """Return the figure cache shared by all sessions of this process."""
+    return FigureCache(max_bytes=int(os.getenv("FIGURE_CACHE_MAX_BYTES", DEFAULT_FIGURE_CACHE_MAX_BYTES)))
@@ -0,0 +1,410 @@
+"""
+Ingest the Traffic Counting REV-4 workbooks in parallel.
+
+Every .xlsx/.xlsb workbook under the region folders (BDG, JABO, JAWA) is parsed
+in its own worker process, reading only the cells listed in
+config.sheet_config_traffic_counting from the Profil_* and HK_Arah*/HL_Arah*
+sheets, and written as one Parquet file of a dataset partitioned by region:
+
+    <parts>/region=<REGION>/<workbook>.parquet
+
+The parts are then merged into a single Parquet file, which can also be
+loaded into the survey_traffic_counting table.
+
+The parts are recorded in an ingestion manifest (see utils.manifest), so a
+rerun only parses new or changed workbooks and drops the parts of removed
+ones. Only workbooks of the given folders can be removed. The workbooks
+loaded into the database are recorded in a second manifest, and every run
+with --to-db replaces, in one transaction, the rows of the workbooks parsed
+or removed since their last load, including by runs without --to-db or
+whose load failed.
+
+Usage:
+    python -m utils.ingest_traffic_counting BDG JABO JAWA                   # parse changed workbooks, one worker per core
+    python -m utils.ingest_traffic_counting BDG JABO JAWA --workers 4
+    python -m utils.ingest_traffic_counting BDG JABO JAWA --to-db           # also update survey_traffic_counting
+    python -m utils.ingest_traffic_counting BDG JABO JAWA --full --to-db    # parse everything and swap in a new table
+"""
+import argparse
+import multiprocessing
+import datetime
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import openpyxl
+import polars as pl
+from openpyxl.utils.datetime import to_excel
+
+from config import sheet_config_traffic_counting
+from utils.manifest import (
+    MANIFEST_NAME, file_fingerprint, forget_missing, is_unchanged, load_manifest, record_source, save_manifest,
+)
+
+
+WORKBOOK_EXTENSIONS = (".xlsx", ".xlsb")
+PARTS_DIR = "data/survey_traffic_counting_parts"
+MERGED_PATH = "data/survey_traffic_counting.parquet"
+TABLE_NAME = "survey_traffic_counting"
+# Manifest of the workbooks loaded into TABLE_NAME, next to the ingestion manifest of the parts
+DB_MANIFEST_NAME = "_db_manifest.json"
+
+PROFIL_SHEET_PREFIX = "Profil"
+COUNT_SHEET_PREFIXES = ("HK_Arah", "HL_Arah")
+SHEET_PREFIXES = (PROFIL_SHEET_PREFIX,) + COUNT_SHEET_PREFIXES
+
+
+def _schema(config: dict = None) -> dict:
+    """
+    Return the column types of one ingested row, in column order.
+    """
+    config = sheet_config_traffic_counting if config is None else config
+    schema = {'filename': pl.String, 'region': pl.String, 'sheet': pl.String}
+    schema.update({name: pl.String for _, _, name in config["config_data"]})
+    for suffix in ("hk", "hl"):
+        schema.update({f"{name}_{suffix}": pl.String for _, _, name in config["config_data_profil"]})
+    for c, name in config["table_data"]["mapping_col"].items():
+        schema[name] = pl.String if c == config["table_data"]["c"][0] else pl.Int64
+    return schema
+
+def _excel_value(value):
+    """Return dates and times as Excel serial numbers, the way .xlsb workbooks store them."""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return to_excel(value)
+    return value
+
+def _is_number(value) -> bool:
+    # .xlsb workbooks return every number as float, .xlsx workbooks return whole numbers as int
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _text(value):
+    return None if value is None else str(value)
+
+def _cell(rows: list, i: int, c: int):
+    """Return the value at 0-based row `i` and column `c`, None outside the read range."""
+    if i >= len(rows) or c >= len(rows[i]):
+        return None
+    return rows[i][c]
+
+def read_sheets(path: str, max_row: int) -> dict:
+    """
+    Read the first `max_row` + 1 rows of the Profil_* and HK_Arah*/HL_Arah* sheets of a workbook.
+
+    Parameters:
+    -----------
+    path : str
+        Path of a .xlsx or .xlsb workbook
+    max_row : int
+        Last 0-based row read, sheets are streamed and reading stops there
+
+    Returns:
+    --------
+    dict
+        Rows of every matching sheet name as lists of cell values, indexed by 0-based row and column
+    """
+    sheets = {}
+    if path.lower().endswith(".xlsb"):
+        # Only needed for the binary workbooks
+        from pyxlsb import open_workbook
+
+        with open_workbook(path) as wb:
+            for name in wb.sheets:
+                if not str(name).startswith(SHEET_PREFIXES):
+                    continue
+                rows = []
+                with wb.get_sheet(name) as sheet:
+                    for row in sheet.rows(sparse=True):
+                        if not row:
+                            continue
+                        if row[0].r > max_row:
+                            break
+                        # Empty rows are skipped by the sparse reader, keep them so rows stay indexed by row number
+                        rows.extend([] for _ in range(row[0].r - len(rows)))
+                        rows.append([cell.v for cell in row])
+                sheets[name] = rows
+    else:
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            for name in wb.sheetnames:
+                if not str(name).startswith(SHEET_PREFIXES):
+                    continue
+                sheets[name] = [
+                    [_excel_value(value) for value in row]
+                    for row in wb[name].iter_rows(min_row=1, max_row=max_row + 1, min_col=1, values_only=True)
+                ]
+        finally:
+            wb.close()
+    return sheets
+
+def parse_workbook(path: str, region: str, config: dict = None) -> pl.DataFrame:
+    """
+    Parse one Traffic Counting workbook into one row per count interval of every HK/HL direction sheet.
+
+    Parameters:
+    -----------
+    path : str
+        Path of a .xlsx or .xlsb workbook
+    region : str
+        Region of the workbook, the name of its folder
+    config : dict, optional
+        Cell layout, defaults to config.sheet_config_traffic_counting
+
+    Returns:
+    --------
+    polars.DataFrame
+        Rows with the columns and types of `_schema`
+    """
+    config = sheet_config_traffic_counting if config is None else config
+    table = config["table_data"]
+    first_row, last_row = table["i"]
+    first_col = table["c"][0]
+    max_row = max([last_row] + [i for i, _, _ in config["config_data"] + config["config_data_profil"]])
+    sheets = read_sheets(path, max_row)
+
+    # Peak hour details of the Profil_HK and Profil_HL sheets, shared by every direction sheet
+    profil = {}
+    for name, rows in sheets.items():
+        if str(name).startswith(PROFIL_SHEET_PREFIX):
+            suffix = "hk" if str(name).endswith("HK") else "hl"
+            for i, c, column in config["config_data_profil"]:
+                value = _cell(rows, i, c)
+                profil[f"{column}_{suffix}"] = "%.2f" % value if _is_number(value) else value
+
+    schema = _schema(config)
+    records = []
+    for name, rows in sheets.items():
+        if not str(name).startswith(COUNT_SHEET_PREFIXES):
+            continue
+        base = {'filename': os.path.basename(path), 'region': region, 'sheet': name}
+        for i, c, column in config["config_data"]:
+            value = _cell(rows, i, c)
+            if value:
+                base[column] = int(value) if _is_number(value) else value
+
+        for i in range(first_row, min(last_row + 1, len(rows))):
+            record = {**base, **profil}
+            for c, column in table["mapping_col"].items():
+                value = _cell(rows, i, c)
+                if c == first_col:
+                    record[column] = value if value else None
+                else:
+                    record[column] = int(value) if _is_number(value) else 0
+            records.append(record)
+
+    # Text columns keep the cell text, numbers included
+    return pl.DataFrame({
+        column: pl.Series(
+            [_text(record.get(column)) if dtype == pl.String else record.get(column) for record in records],
+            dtype=dtype,
+        )
+        for column, dtype in schema.items()
+    })
+
+def part_path(parts_dir: str, region: str, path: str) -> str:
+    """
+    Return the Parquet part written for a workbook, <parts_dir>/region=<region>/<workbook>.parquet.
+    """
+    return os.path.join(parts_dir, f"region={region}", os.path.basename(path) + ".parquet")
+
+def ingest_workbook(path: str, region: str, parts_dir: str) -> tuple:
+    """
+    Parse a workbook and write its Parquet part, run in a worker process.
+
+    Returns:
+    --------
+    tuple
+        (part path, number of rows, fingerprint of the workbook as parsed, see utils.manifest.file_fingerprint)
+    """
+    fingerprint = file_fingerprint(path)
+    df = parse_workbook(path, region)
+    target = part_path(parts_dir, region, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Write to a temporary file first so a failed run never leaves a partial part
+    df.write_parquet(target + ".tmp")
+    os.replace(target + ".tmp", target)
+    return target, df.height, fingerprint
+
+def workbook_region(path: str) -> str:
+    """
+    Return the region of a workbook, the name of its folder.
+    """
+    return os.path.basename(os.path.dirname(os.path.abspath(path)))
+
+def list_workbooks(folders: list) -> list:
+    """
+    List the (path, region) of every workbook in the region folders, in folder and file name order.
+    """
+    workbooks = []
+    for folder in folders:
+        for filename in sorted(os.listdir(folder)):
+            # Skip Excel lock files of workbooks open on the surveyor's machine
+            if filename.lower().endswith(WORKBOOK_EXTENSIONS) and not filename.startswith("~$"):
+                path = os.path.join(folder, filename)
+                workbooks.append((path, workbook_region(path)))
+    return workbooks
+
+def ingest_workbooks(workbooks: list, parts_dir: str, workers: int = None) -> dict:
+    """
+    Parse the workbooks over a process pool, one Parquet part per workbook.
+
+    Parameters:
+    -----------
+    workbooks : list
+        (path, region) of the workbooks, see `list_workbooks`
+    parts_dir : str
+        Root of the region-partitioned Parquet dataset
+    workers : int, optional
+        Number of worker processes, defaults to the number of cores
+
+    Returns:
+    --------
+    dict
+        (part path, number of rows, fingerprint) of every workbook path, failed workbooks are reported and left out
+    """
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {
+            executor.submit(ingest_workbook, path, region, parts_dir): path
+            for path, region in workbooks
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                print(f"Warning: failed to ingest {path}: {e}")
+                continue
+            print(f"{path}: {results[path][1]} rows")
+    return results
+
+def merge_parts(parts: list, output: str) -> pl.DataFrame:
+    """
+    Concatenate Parquet parts, in the given order, into a single Parquet file.
+
+    Returns:
+    --------
+    polars.DataFrame
+        The merged table
+    """
+    df = pl.concat([pl.read_parquet(part) for part in parts], how='vertical') if parts else pl.DataFrame(schema=_schema())
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    df.write_parquet(output + ".tmp")
+    os.replace(output + ".tmp", output)
+    return df
+
+def replace_in_db(df: pl.DataFrame, workbooks: list = None):
+    """
+    Replace the rows of some workbooks in the survey_traffic_counting table.
+
+    Parameters:
+    -----------
+    df : polars.DataFrame
+        New rows of the workbooks
+    workbooks : list, optional
+        (path, region) of the workbooks whose rows are deleted first,
+        if None `df` replaces the whole table (see utils.util.df_to_db)
+    """
+    # The database connection is only needed when loading
+    from sqlalchemy import inspect, text
+    from utils.util import df_to_db, get_engine
+
+    if workbooks is None:
+        df_to_db(df=df, table_name=TABLE_NAME, if_exists="replace")
+        return
+
+    # One transaction, so a failed load keeps the old rows
+    with get_engine().begin() as conn:
+        if workbooks and inspect(conn).has_table(TABLE_NAME):
+            conn.execute(
+                text(f"DELETE FROM {TABLE_NAME} WHERE region = :region AND filename = :filename"),
+                [{"region": region, "filename": os.path.basename(path)} for path, region in workbooks],
+            )
+        if df.height:
+            df_to_db(df=df, table_name=TABLE_NAME, con=conn)
+
+def update_db(manifest: dict, db_manifest_path: str, df: pl.DataFrame = None):
+    """
+    Bring the survey_traffic_counting table up to date with the ingestion manifest.
+
+    The db manifest records the content hash of the version of every workbook
+    loaded into the table. Workbooks not loaded yet or loaded from another
+    version are reloaded, and the rows of workbooks no longer in the ingestion
+    manifest are deleted. The db manifest is only saved once the load succeeded.
+
+    Parameters:
+    -----------
+    manifest : dict
+        Ingestion manifest of the parts, see utils.manifest
+    db_manifest_path : str
+        Path of the db manifest
+    df : polars.DataFrame, optional
+        Rows of every manifest entry, if given they replace the whole table
+    """
+    db_manifest = {} if df is not None else load_manifest(db_manifest_path)
+    to_load = [key for key in sorted(manifest) if db_manifest.get(key, {}).get("sha1") != manifest[key]["sha1"]]
+    to_delete = [key for key in db_manifest if key not in manifest]
+
+    if df is not None:
+        replace_in_db(df)
+    else:
+        parts = [manifest[key]["outputs"][0] for key in to_load]
+        load_df = pl.concat([pl.read_parquet(part) for part in parts], how='vertical') if parts else pl.DataFrame(schema=_schema())
+        replace_in_db(load_df, [(key, workbook_region(key)) for key in to_load + to_delete])
+    print(f"{TABLE_NAME}: {len(to_load)} workbooks loaded, {len(to_delete)} removed")
+
+    loaded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+    save_manifest({
+        key: {"sha1": manifest[key]["sha1"], "loaded_at": loaded_at} if key in to_load else db_manifest[key]
+        for key in manifest
+    }, db_manifest_path)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Ingest the Traffic Counting REV-4 workbooks in parallel.")
+    parser.add_argument("folders", nargs="+", help="Region folders holding the workbooks, e.g. BDG JABO JAWA")
+    parser.add_argument("--parts", default=PARTS_DIR, help="Root of the per-workbook Parquet dataset")
+    parser.add_argument("--output", default=MERGED_PATH, help="Merged Parquet file")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, defaults to the number of cores")
+    parser.add_argument("--to-db", action="store_true", help=f"Replace the rows of the workbooks parsed or removed since their last load in {TABLE_NAME}")
+    parser.add_argument("--full", action="store_true", help="Parse every workbook of the folders, even unchanged ones")
+    args = parser.parse_args(argv)
+
+    manifest_path = os.path.join(args.parts, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    workbooks = list_workbooks(args.folders)
+
+    # Workbooks no longer in the folders lose their part, workbooks of other folders are kept
+    removed = forget_missing(manifest, [path for path, _ in workbooks], args.folders)
+    for entry in removed.values():
+        for output in entry["outputs"]:
+            if os.path.exists(output):
+                os.remove(output)
+
+    changed = [(path, region) for path, region in workbooks if args.full or not is_unchanged(manifest, path)]
+    print(f"{len(changed)} new or changed, {len(workbooks) - len(changed)} unchanged, {len(removed)} removed workbooks")
+    results = ingest_workbooks(changed, args.parts, workers=args.workers)
+    # A failed workbook keeps its previous entry and part, if any, and is parsed again on the next run
+    parsed = [(path, region) for path, region in changed if path in results]
+    for path, _ in parsed:
+        part, rows, fingerprint = results[path]
+        record_source(manifest, path, fingerprint, rows, [part])
+
+    # Merge every workbook of the manifest, also those of folders not given, in source order so reruns produce the same table
+    parts = [manifest[key]["outputs"][0] for key in sorted(manifest)]
+    df = merge_parts(parts, args.output)
+    print(f"{len(parts)} workbooks -> {args.output} ({df.height} rows)")
+
+    save_manifest(manifest, manifest_path)
+
+    if args.to_db:
+        db_manifest_path = os.path.join(args.parts, DB_MANIFEST_NAME)
+        if args.full and len(parsed) != len(changed):
+            print(f"Warning: {len(changed) - len(parsed)} workbooks failed, {TABLE_NAME} not replaced")
+        else:
+            # Failed workbooks keep their previous entry, so their rows stay until they are parsed
+            update_db(manifest, db_manifest_path, df if args.full else None)
+    return 0 if len(parsed) == len(changed) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
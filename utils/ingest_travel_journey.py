@@ -0,0 +1,263 @@
+"""
+Read the Travel Journey survey workbook into Polars frames.
+
+The workbook is opened read-only, so openpyxl streams each sheet row by row
+instead of loading every sheet in full, and only the sheets and column ranges
+listed in config.sheet_config_travel_journey are read. Tables sharing a start
+row are read in one pass over the sheet, and every table is collected column
+by column and converted to a typed Polars column once.
+
+The workbook is recorded in the ingestion manifest of the output directory
+(see utils.manifest), and is not parsed again until it changes.
+
+Usage:
+    python -m utils.ingest_travel_journey "Travel Journeyy.xlsx"              # write the snapshots in data/
+    python -m utils.ingest_travel_journey "Travel Journeyy.xlsx" out_dir      # write the snapshots in out_dir/
+    python -m utils.ingest_travel_journey "Travel Journeyy.xlsx" --full       # parse even if unchanged
+"""
+import argparse
+import datetime
+import os
+import sys
+
+import openpyxl
+import polars as pl
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string
+
+from config import sheet_config_travel_journey
+from utils.manifest import MANIFEST_NAME, file_fingerprint, is_unchanged, load_manifest, record_source, save_manifest
+
+
+# Columns of the tracking tables, in sheet order, and their types
+TRACKING_SCHEMA = {
+    'timestamp': pl.String,
+    'kmph': pl.Float64,
+    'y': pl.Float64,
+    'x': pl.Float64,
+    'waktu': pl.String,
+    'jarak': pl.Float64,
+    'waktu_menit': pl.Float64,
+    'jarak_km': pl.Float64,
+}
+
+# Cells of the base sheet (e.g. "TJ-1" for "Grafik TJ-1") holding the route ends and the Google Maps distance
+ARAH_AWAL_CELL = "C3"
+ARAH_AKHIR_CELL = "C4"
+GMAP_CELL = "D14"
+GMAP_CELL_OVERRIDES = {"TJ-18": "D19"}
+
+# Snapshots written by the command line, read by utils.convert_snapshots and the Travel Journey page
+TRACKING_SNAPSHOT = "survey_travel_journey.feather"
+JARAK_SNAPSHOT = "survey_travel_journey_jarak.feather"
+
+
+def base_sheet_name(sheet_name: str) -> str:
+    """
+    Return the sheet holding the route details of a chart sheet, e.g. "TJ-1" for "Grafik TJ-1".
+    """
+    return sheet_name.split(' ')[-1]
+
+def _cell_value(value, column: str):
+    """Normalize one cell the way the survey tables are stored."""
+    if column == 'kmph' and isinstance(value, datetime.datetime):
+        # Speed cells formatted as dates are empty readings
+        return 0
+    if isinstance(value, datetime.time):
+        return value.strftime("%H:%M:%S")
+    return value
+
+def _typed_column(values: list, dtype) -> pl.Series:
+    """Build a typed column, values that cannot be converted become null."""
+    if dtype == pl.String:
+        return pl.Series([None if value is None else str(value) for value in values], dtype=pl.String)
+    # Dates and times are not numbers, stringify them so they become null instead of failing the cast
+    values = [str(value) if isinstance(value, (datetime.date, datetime.time)) else value for value in values]
+    return pl.Series(values, dtype=dtype, strict=False)
+
+def read_cells(worksheet, cells: list) -> dict:
+    """
+    Read single cells of a read-only worksheet in one pass.
+
+    Parameters:
+    -----------
+    worksheet : openpyxl.worksheet._read_only.ReadOnlyWorksheet
+        Sheet to read
+    cells : list
+        Cell references, e.g. ["C3", "C4", "D14"]
+
+    Returns:
+    --------
+    dict
+        Value of every cell reference
+    """
+    coordinates = {cell: coordinate_from_string(cell) for cell in cells}
+    rows = [row for _, row in coordinates.values()]
+    cols = [column_index_from_string(col) for col, _ in coordinates.values()]
+    min_row, min_col = min(rows), min(cols)
+
+    block = list(worksheet.iter_rows(min_row=min_row, max_row=max(rows),
+                                     min_col=min_col, max_col=max(cols), values_only=True))
+    values = {}
+    for cell, (col, row) in coordinates.items():
+        block_row = block[row - min_row] if row - min_row < len(block) else ()
+        col_idx = column_index_from_string(col) - min_col
+        values[cell] = block_row[col_idx] if col_idx < len(block_row) else None
+    return values
+
+def read_tables(worksheet, tables: list, width: int) -> dict:
+    """
+    Read the tables of a sheet, each ending at its first empty row.
+
+    Tables starting on the same row are read in a single streaming pass over
+    the columns spanning all of them.
+
+    Parameters:
+    -----------
+    worksheet : openpyxl.worksheet._read_only.ReadOnlyWorksheet
+        Sheet to read
+    tables : list
+        Table configs with "name", "row", "start_col" and "end_col", see config.sheet_config_travel_journey
+    width : int
+        Number of columns kept per table, counted from "start_col"
+
+    Returns:
+    --------
+    dict
+        Rows of every table name, as a list of `width` column lists
+    """
+    result = {}
+    for start_row in sorted({table["row"] for table in tables}):
+        row_tables = [table for table in tables if table["row"] == start_row]
+        spans = {
+            table["name"]: (column_index_from_string(table["start_col"]), column_index_from_string(table["end_col"]))
+            for table in row_tables
+        }
+        min_col = min(start for start, _ in spans.values())
+        max_col = max(end for _, end in spans.values())
+
+        columns = {name: [[] for _ in range(width)] for name in spans}
+        active = set(spans)
+        for row in worksheet.iter_rows(min_row=start_row, min_col=min_col, max_col=max_col, values_only=True):
+            for name in list(active):
+                start, end = spans[name]
+                cells = row[start - min_col:end - min_col + 1]
+                if all(cell is None for cell in cells):
+                    active.discard(name)
+                    continue
+                cells = tuple(cells[:width]) + (None,) * (width - len(cells))
+                for values, cell in zip(columns[name], cells):
+                    values.append(cell)
+            if not active:
+                break
+        result.update(columns)
+    return {table["name"]: result[table["name"]] for table in tables}
+
+def read_travel_journey_workbook(path: str, config: list = None):
+    """
+    Read the tracking and checkpoint distance tables of the Travel Journey workbook.
+
+    Parameters:
+    -----------
+    path : str
+        Path of the Travel Journey workbook (.xlsx)
+    config : list, optional
+        Sheet and table layout, defaults to config.sheet_config_travel_journey
+
+    Returns:
+    --------
+    tuple
+        (tracking_df, jarak_df) as polars.DataFrame:
+        tracking_df has the TRACKING_SCHEMA columns plus arah, sheet, gmap, arah_awal, arah_akhir,
+        jarak_df has jarak, arah, sheet and seq
+    """
+    config = sheet_config_travel_journey if config is None else config
+    column_names = list(TRACKING_SCHEMA)
+
+    tracking_frames = []
+    jarak_frames = []
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet_config in config:
+            for sheet_name in sheet_config["sheets"]:
+                base_name = base_sheet_name(sheet_name)
+                base_sheet = wb[base_name]
+                gmap_cell = GMAP_CELL_OVERRIDES.get(base_name, GMAP_CELL)
+                details = read_cells(base_sheet, [ARAH_AWAL_CELL, ARAH_AKHIR_CELL, gmap_cell])
+                arah_awal = _typed_column([details[ARAH_AWAL_CELL]], pl.String)[0]
+                arah_akhir = _typed_column([details[ARAH_AKHIR_CELL]], pl.String)[0]
+                gmap = _typed_column([details[gmap_cell]], pl.Float64)[0]
+
+                tables = read_tables(wb[sheet_name], sheet_config["tables"], len(column_names))
+                for table in sheet_config["tables"]:
+                    name = table["name"]
+                    values = tables[name]
+                    n_rows = len(values[0])
+                    # Direction B drives from the end of the route back to its start
+                    is_arah_b = str(name).startswith("arah B")
+                    frame = pl.DataFrame([
+                        _typed_column([_cell_value(value, column) for value in column_values], TRACKING_SCHEMA[column]).alias(column)
+                        for column, column_values in zip(column_names, values)
+                    ]).with_columns(
+                        pl.lit(name, dtype=pl.String).alias('arah'),
+                        pl.lit(sheet_name, dtype=pl.String).alias('sheet'),
+                        pl.lit(gmap, dtype=pl.Float64).alias('gmap'),
+                        pl.lit(arah_akhir if is_arah_b else arah_awal, dtype=pl.String).alias('arah_awal'),
+                        pl.lit(arah_awal if is_arah_b else arah_akhir, dtype=pl.String).alias('arah_akhir'),
+                    )
+                    tracking_frames.append(frame)
+                    print(f"{sheet_name} {name}: {n_rows} rows")
+
+                # Checkpoint distances, numbered up along direction A and back down along direction B
+                jarak_tables = read_tables(base_sheet, sheet_config["tables_jarak"], 1)
+                seq = 1
+                for table in sheet_config["tables_jarak"]:
+                    name = table["name"]
+                    jarak = jarak_tables[name][0]
+                    if str(name).startswith("arah B"):
+                        seq_values = list(range(seq - 1, seq - 1 - len(jarak), -1))
+                        seq -= len(jarak)
+                    else:
+                        seq_values = list(range(seq, seq + len(jarak)))
+                        seq += len(jarak)
+                    jarak_frames.append(pl.DataFrame({
+                        'jarak': _typed_column(jarak, pl.Float64),
+                        'arah': pl.Series([name] * len(jarak), dtype=pl.String),
+                        'sheet': pl.Series([sheet_name] * len(jarak), dtype=pl.String),
+                        'seq': pl.Series(seq_values, dtype=pl.Int64),
+                    }))
+    finally:
+        wb.close()
+
+    return pl.concat(tracking_frames, how='vertical'), pl.concat(jarak_frames, how='vertical')
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Read the Travel Journey workbook into the dashboard snapshots.")
+    parser.add_argument("workbook", help="Travel Journey workbook (.xlsx)")
+    parser.add_argument("out_dir", nargs="?", default="data", help="Directory of the snapshots")
+    parser.add_argument("--full", action="store_true", help="Parse the workbook even if it is unchanged")
+    args = parser.parse_args(argv)
+
+    manifest_path = os.path.join(args.out_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    if not args.full and is_unchanged(manifest, args.workbook):
+        print(f"{args.workbook} unchanged, snapshots kept")
+        save_manifest(manifest, manifest_path)
+        return
+
+    fingerprint = file_fingerprint(args.workbook)
+    tracking_df, jarak_df = read_travel_journey_workbook(args.workbook)
+    os.makedirs(args.out_dir, exist_ok=True)
+    targets = []
+    for df, name in [(tracking_df, TRACKING_SNAPSHOT), (jarak_df, JARAK_SNAPSHOT)]:
+        target = os.path.join(args.out_dir, name)
+        # Write to a temporary file first so running dashboards never see a partial file
+        df.write_ipc(target + ".tmp", compression='uncompressed')
+        os.replace(target + ".tmp", target)
+        targets.append(target)
+        print(f"{args.workbook} -> {target} ({df.height} rows)")
+    record_source(manifest, args.workbook, fingerprint, tracking_df.height, targets)
+    save_manifest(manifest, manifest_path)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
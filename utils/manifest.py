@@ -0,0 +1,111 @@
+"""
+Ingestion manifest of the source workbooks already parsed.
+
+Every entry records a source file's size, mtime and content hash, the rows it
+produced and the output files holding them, so a rerun of an ingestion job
+only re-parses new or changed files and replaces just their outputs.
+
+A file whose size and mtime match its entry is unchanged without being read.
+Otherwise its content hash decides, so a re-copied but identical workbook is
+not parsed again.
+"""
+import hashlib
+import json
+import os
+import time
+
+
+MANIFEST_NAME = "_manifest.json"
+
+
+def file_digest(path: str) -> str:
+    """
+    Return the SHA-1 of a file's content, read in 1 MB chunks.
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_fingerprint(path: str) -> dict:
+    """
+    Return the size, mtime and content hash of a file.
+
+    Take it before parsing the file, so a file replaced while it is parsed is seen as changed on the next run.
+    """
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": file_digest(path)}
+
+def source_key(path: str) -> str:
+    """
+    Return the manifest key of a source file, its absolute path.
+    """
+    return os.path.abspath(path)
+
+def load_manifest(path: str) -> dict:
+    """
+    Load a manifest, an empty one if the file does not exist yet.
+
+    Returns:
+    --------
+    dict
+        Entry of every source key, see `record_source`
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(manifest: dict, path: str):
+    """
+    Write a manifest, replacing the previous one atomically.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def is_unchanged(manifest: dict, path: str) -> bool:
+    """
+    Return whether a source file is unchanged since its manifest entry and its outputs still exist.
+
+    When only the mtime changed but the content is identical, the entry is refreshed
+    in place so the next run does not hash the file again.
+    """
+    entry = manifest.get(source_key(path))
+    if entry is None or not all(os.path.exists(output) for output in entry["outputs"]):
+        return False
+
+    stat = os.stat(path)
+    if (stat.st_size, stat.st_mtime_ns) == (entry["size"], entry["mtime_ns"]):
+        return True
+    if stat.st_size != entry["size"] or file_digest(path) != entry["sha1"]:
+        return False
+    entry["mtime_ns"] = stat.st_mtime_ns
+    return True
+
+def record_source(manifest: dict, path: str, fingerprint: dict, rows: int, outputs: list):
+    """
+    Record that a source file with `fingerprint` (see `file_fingerprint`) was parsed into `rows` rows written to `outputs`.
+    """
+    manifest[source_key(path)] = {
+        **fingerprint,
+        "rows": rows,
+        "outputs": list(outputs),
+        "ingested_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def forget_missing(manifest: dict, paths: list, folders: list = None) -> dict:
+    """
+    Remove the entries of source files no longer in `paths` and return them.
+
+    If `folders` is given, only the entries of files directly in one of these folders
+    can be removed, so a run over some folders keeps the entries of the others.
+    """
+    keep = {source_key(path) for path in paths}
+    scope = None if folders is None else {os.path.abspath(folder) for folder in folders}
+    return {
+        key: manifest.pop(key) for key in list(manifest)
+        if key not in keep and (scope is None or os.path.dirname(key) in scope)
+    }
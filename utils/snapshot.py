@@ -0,0 +1,222 @@
+import hashlib
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import streamlit as st
+
+# Snapshot formats read by column with a memory map, in order of preference
+COLUMNAR_SUFFIXES = (".arrow", ".parquet")
+
+# Load statistics per snapshot path, filled in every time a snapshot is (re)loaded
+_snapshot_stats = {}
+
+# Memoized content hashes, keyed by path and invalidated when (mtime, size) changes
+_content_hashes = {}
+
+# Schema metadata key of derived snapshots holding the hash of the files they were built from
+DERIVED_SOURCE_HASH_KEY = b"source_hash"
+
+
+def _file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_version(path, content_hash=False):
+    """
+    Return a cheap version token for a snapshot file (or its columnar sibling).
+
+    Parameters:
+    -----------
+    path : str
+        Path to the snapshot file
+    content_hash : bool
+        If True, the token is the SHA-1 of the file content. The hash is only
+        recomputed when the file's mtime or size changes, so a re-copied but
+        identical drop does not trigger a reload.
+
+    Returns:
+    --------
+    str
+        Version token, changes whenever a new drop of the file lands on disk
+    """
+    path = resolve_snapshot_path(path)
+    stat = os.stat(path)
+    stat_key = (stat.st_mtime_ns, stat.st_size)
+    if not content_hash:
+        return f"{stat_key[0]}-{stat_key[1]}"
+
+    cached = _content_hashes.get(path)
+    if cached is None or cached[0] != stat_key:
+        cached = (stat_key, _file_digest(path))
+        _content_hashes[path] = cached
+    return cached[1]
+
+
+def resolve_snapshot_path(path):
+    """
+    Return the columnar sibling of a snapshot (e.g. data/x.arrow for data/x.pkl)
+    if one has been generated with `python -m utils.convert_snapshots`, else `path`.
+
+    A sibling older than `path` is stale (a new drop landed after the conversion)
+    and is ignored, so new drops are picked up even before they are converted.
+    """
+    stem, suffix = os.path.splitext(path)
+    if suffix in COLUMNAR_SUFFIXES:
+        return path
+    source_mtime = os.stat(path).st_mtime_ns if os.path.exists(path) else None
+    for columnar_suffix in COLUMNAR_SUFFIXES:
+        sibling = stem + columnar_suffix
+        if os.path.exists(sibling) and (source_mtime is None or os.stat(sibling).st_mtime_ns >= source_mtime):
+            return sibling
+    return path
+
+
+def read_snapshot_file(path, columns=None):
+    """
+    Read a snapshot file, only materializing the requested columns.
+
+    Arrow IPC (.arrow/.feather) files are memory-mapped, so processes reading the
+    same file share its page-cache pages instead of each holding a private copy.
+
+    Parameters:
+    -----------
+    path : str
+        Path to a .arrow, .feather, .parquet or .pkl file
+    columns : list of str, optional
+        Columns to read, all columns if None
+
+    Returns:
+    --------
+    pandas.DataFrame
+        The snapshot data
+    """
+    columns = list(columns) if columns is not None else None
+    suffix = os.path.splitext(path)[1]
+    if suffix in (".arrow", ".feather"):
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        return table.to_pandas(split_blocks=True)
+    if suffix == ".parquet":
+        return pd.read_parquet(path, columns=columns, memory_map=True)
+
+    df = pd.read_pickle(path)
+    return df[columns] if columns is not None else df
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _load_snapshot(path, version, columns):
+    start = time.perf_counter()
+    df = read_snapshot_file(path, columns=columns)
+    _snapshot_stats[(path, columns)] = {
+        "path": path,
+        "version": version,
+        "rows": len(df),
+        "load_seconds": time.perf_counter() - start,
+        "memory_bytes": int(df.memory_usage(deep=True).sum()),
+        "loaded_at": time.time(),
+    }
+    return df
+
+
+def load_snapshot(path, columns=None, content_hash=False):
+    """
+    Load a snapshot once per process and reload it only when the file changes.
+
+    A columnar sibling of `path` is preferred when present, see `resolve_snapshot_path`.
+
+    The returned DataFrame is shared between sessions, callers must not modify it in place.
+
+    Parameters:
+    -----------
+    path : str
+        Path to the snapshot file
+    columns : list of str, optional
+        Columns the caller renders, all columns if None
+    content_hash : bool
+        Key the cache on file content instead of mtime/size, see `snapshot_version`
+
+    Returns:
+    --------
+    pandas.DataFrame
+        The loaded snapshot
+    """
+    path = resolve_snapshot_path(path)
+    columns = tuple(columns) if columns is not None else None
+    return _load_snapshot(path, snapshot_version(path, content_hash=content_hash), columns)
+
+
+def snapshot_stats():
+    """
+    Return load time and memory size of every snapshot loaded by this process.
+
+    Returns:
+    --------
+    pandas.DataFrame
+        One row per snapshot path with columns
+        [path, version, rows, load_seconds, memory_bytes, loaded_at]
+    """
+    return pd.DataFrame(
+        list(_snapshot_stats.values()),
+        columns=["path", "version", "rows", "load_seconds", "memory_bytes", "loaded_at"],
+    )
+
+
+def sources_hash(paths):
+    """
+    Return one content hash for a set of snapshot files, see `snapshot_version`.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(snapshot_version(path, content_hash=True).encode())
+    return digest.hexdigest()
+
+
+def read_derived_snapshot(path, source_hash, columns=None):
+    """
+    Read a snapshot derived from other snapshots, if it is still fresh.
+
+    Parameters:
+    -----------
+    path : str
+        Path to the derived .arrow file, see `write_derived_snapshot`
+    source_hash : str
+        Current hash of the source files, see `sources_hash`
+    columns : list of str, optional
+        Columns to read, all columns if None
+
+    Returns:
+    --------
+    pandas.DataFrame or None
+        The derived data, or None if the file is missing or was built from other sources
+    """
+    if not os.path.exists(path):
+        return None
+    with pa.memory_map(path) as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+    if metadata.get(DERIVED_SOURCE_HASH_KEY) != source_hash.encode():
+        return None
+    return read_snapshot_file(path, columns=columns)
+
+
+def write_derived_snapshot(df, path, source_hash):
+    """
+    Write `df` as an uncompressed Arrow IPC file tagged with the hash of its source files.
+
+    Failing to write (e.g. a read-only data directory) is not an error, the data
+    is simply rebuilt on the next cold start.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), DERIVED_SOURCE_HASH_KEY: source_hash.encode()})
+    # Write to a temporary file first so running dashboards never see a partial file
+    tmp_path = path + ".tmp"
+    try:
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: could not write {path}: {e}")
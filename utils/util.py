@@ -1,7 +1,11 @@
+import io
+import threading
+
 import polars as pl
 import pandas as pd
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import Engine
 from urllib.parse import quote
 from dotenv import load_dotenv
 import os
@@ -11,27 +15,29 @@ load_dotenv()
 
 # Define a mapping between Polars data types and PostgreSQL data types
 polars_to_postgres = {
-    pl.Int64: "INTEGER",
+    pl.Int64: "BIGINT",
     pl.Int32: "INTEGER",
     pl.Int16: "SMALLINT",
     pl.Float64: "DOUBLE PRECISION",
     pl.Float32: "REAL",
-    pl.Utf8: "TEXT",
+    pl.String: "TEXT",
     pl.Boolean: "BOOLEAN",
     pl.Date: "DATE",
     pl.Datetime: "TIMESTAMP",
     pl.Time: "TIME",
-    pl.String: "VARCHAR(500)"
 }
 
+def _quote_identifier(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
 # Function to generate the CREATE TABLE DDL statement
 def generate_postgres_ddl(df: pl.DataFrame, table_name: str) -> str:
     columns = []
     for name, dtype in zip(df.columns, df.dtypes):
-        postgres_type = polars_to_postgres.get(dtype, "TEXT")  # Default to TEXT if type not found
-        columns.append(f'"{name}" {postgres_type}')
+        postgres_type = polars_to_postgres.get(dtype.base_type(), "TEXT")  # Default to TEXT if type not found
+        columns.append(f'{_quote_identifier(name)} {postgres_type}')
     
-    ddl = f"CREATE TABLE {table_name} (\n  " + ",\n  ".join(columns) + "\n);"
+    ddl = f"CREATE TABLE {_quote_identifier(table_name)} (\n  " + ",\n  ".join(columns) + "\n);"
     return ddl
 
 # MASTER_DB POSTGRES
@@ -40,12 +46,221 @@ MASTER_DB_USER=os.getenv("MASTER_DB_USER")
 MASTER_DB_PASS=os.getenv("MASTER_DB_PASS")
 MASTER_DB_NAME=os.getenv("MASTER_DB_NAME")
 
-engine = create_engine(f"postgresql://{MASTER_DB_USER}:{quote(MASTER_DB_PASS)}@{MASTER_DB_HOST}/{MASTER_DB_NAME}")
+# Connection pool of the MASTER_DB engine
+MASTER_DB_POOL_SIZE = int(os.getenv("MASTER_DB_POOL_SIZE", 5))
+MASTER_DB_MAX_OVERFLOW = int(os.getenv("MASTER_DB_MAX_OVERFLOW", 5))
+MASTER_DB_POOL_TIMEOUT = 30  # seconds to wait for a free pooled connection
+MASTER_DB_POOL_RECYCLE = 1800  # seconds before a pooled connection is replaced
+MASTER_DB_CONNECT_TIMEOUT = int(os.getenv("MASTER_DB_CONNECT_TIMEOUT", 10))  # seconds
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """
+    Return the MASTER_DB engine, created on first use.
+
+    Importing this module does not connect, so the dashboard and the ingestion
+    jobs start even when the database is unreachable. The pool checks every
+    connection before handing it out (pre-ping) and gives up on unreachable
+    hosts after MASTER_DB_CONNECT_TIMEOUT seconds.
+
+    Returns:
+    --------
+    sqlalchemy.engine.Engine
+        The pooled engine, shared by the whole process
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            missing = [name for name, value in [
+                ("MASTER_DB_HOST", MASTER_DB_HOST), ("MASTER_DB_USER", MASTER_DB_USER),
+                ("MASTER_DB_PASS", MASTER_DB_PASS), ("MASTER_DB_NAME", MASTER_DB_NAME),
+            ] if value is None]
+            if missing:
+                raise RuntimeError(f"Database settings missing from the environment/.env: {', '.join(missing)}")
+            _engine = create_engine(
+                f"postgresql://{MASTER_DB_USER}:{quote(MASTER_DB_PASS)}@{MASTER_DB_HOST}/{MASTER_DB_NAME}",
+                pool_size=MASTER_DB_POOL_SIZE,
+                max_overflow=MASTER_DB_MAX_OVERFLOW,
+                pool_timeout=MASTER_DB_POOL_TIMEOUT,
+                pool_recycle=MASTER_DB_POOL_RECYCLE,
+                pool_pre_ping=True,
+                connect_args={"connect_timeout": MASTER_DB_CONNECT_TIMEOUT},
+            )
+        return _engine
+
+def __getattr__(name):
+    # `from utils.util import engine` keeps working and creates the engine on first use
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Rows sent per COPY (PostgreSQL) or executemany (SQLite) batch by df_to_db
+DB_CHUNK_SIZE = 100_000
+
+def _copy_chunks(cursor, df: pl.DataFrame, table_name: str, chunk_size: int):
+    """Stream `df` into a PostgreSQL table with COPY FROM STDIN, one CSV buffer per chunk."""
+    columns = ", ".join(_quote_identifier(column) for column in df.columns)
+    # In CSV format an unquoted empty field is NULL, Polars quotes empty strings
+    sql = f"COPY {_quote_identifier(table_name)} ({columns}) FROM STDIN WITH (FORMAT csv)"
+    for offset in range(0, df.height, chunk_size):
+        buffer = io.BytesIO()
+        df.slice(offset, chunk_size).write_csv(buffer, include_header=False)
+        if hasattr(cursor, "copy_expert"):
+            # psycopg2
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+        else:
+            # psycopg 3, the driver SQLAlchemy 2.1 picks for postgresql:// URLs
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getbuffer())
+
+def _insert_chunks(cursor, df: pl.DataFrame, table_name: str, chunk_size: int):
+    """Insert `df` into a SQLite table, one executemany per chunk."""
+    columns = ", ".join(_quote_identifier(column) for column in df.columns)
+    placeholders = ", ".join("?" for _ in df.columns)
+    sql = f"INSERT INTO {_quote_identifier(table_name)} ({columns}) VALUES ({placeholders})"
+    for offset in range(0, df.height, chunk_size):
+        cursor.executemany(sql, df.slice(offset, chunk_size).iter_rows())
+
+def df_to_db(df: pl.DataFrame, table_name: str, if_exists: str = "append", chunk_size: int = DB_CHUNK_SIZE, con=None):
+    """
+    Bulk load a Polars DataFrame into a database table, without going through pandas.
+
+    On PostgreSQL the rows are streamed with COPY FROM STDIN as CSV, on SQLite
+    (local runs and tests) they are inserted with executemany. Either way the
+    whole load is one transaction: readers see all of the new rows or none.
 
-def df_to_db(df: pl.DataFrame, table_name: str):
-    pd_df = df.to_pandas()
-    pd_df.to_sql(table_name, con=engine, if_exists='append', index=False)
+    Parameters:
+    -----------
+    df : polars.DataFrame
+        Rows to load, the column names are the table's column names
+    table_name : str
+        Target table, created from `generate_postgres_ddl` if it does not exist
+    if_exists : str
+        "append" adds the rows to the table,
+        "replace" loads them into a staging table that then replaces the table in the same transaction,
+        so a full refresh never exposes an empty or partial table
+    chunk_size : int
+        Rows per COPY buffer or executemany batch, bounds the memory used by the load
+    con : sqlalchemy.engine.Engine or sqlalchemy.engine.Connection, optional
+        Database to load into, defaults to the MASTER_DB engine (see `get_engine`).
+        An open Connection loads inside its current transaction, which the caller
+        commits or rolls back, e.g. to delete rows and load their replacement atomically
+    """
+    if if_exists not in ("append", "replace"):
+        raise ValueError(f"if_exists must be 'append' or 'replace', got {if_exists!r}")
+    con = get_engine() if con is None else con
+    is_postgres = con.dialect.name == "postgresql"
+    write_chunks = _copy_chunks if is_postgres else _insert_chunks
+
+    owns_transaction = isinstance(con, Engine)
+    raw_connection = con.raw_connection() if owns_transaction else con.connection
+    try:
+        cursor = raw_connection.cursor()
+        if not is_postgres and not raw_connection.in_transaction:
+            # SQLite only opens a transaction at the first INSERT, open it before the DDL
+            cursor.execute("BEGIN")
+        if if_exists == "replace":
+            staging_table = f"{table_name}__staging"
+            cursor.execute(f"DROP TABLE IF EXISTS {_quote_identifier(staging_table)}")
+            cursor.execute(generate_postgres_ddl(df=df, table_name=staging_table))
+            write_chunks(cursor, df, staging_table, chunk_size)
+            cursor.execute(f"DROP TABLE IF EXISTS {_quote_identifier(table_name)}")
+            cursor.execute(f"ALTER TABLE {_quote_identifier(staging_table)} RENAME TO {_quote_identifier(table_name)}")
+        else:
+            if not inspect(con).has_table(table_name):
+                cursor.execute(generate_postgres_ddl(df=df, table_name=table_name))
+            write_chunks(cursor, df, table_name, chunk_size)
+        if owns_transaction:
+            raw_connection.commit()
+    except Exception:
+        if owns_transaction:
+            raw_connection.rollback()
+        raise
+    finally:
+        if owns_transaction:
+            raw_connection.close()
     
-def read_database(engine, query):
-    df = pd.read_sql(query, con=engine)
-    return df
+# Rows fetched per round trip by the streaming reads
+DB_FETCH_SIZE = 50_000
+
+def _streaming_connection(engine, fetch_size: int):
+    """Open a connection whose results are read through a server-side cursor, `fetch_size` rows at a time."""
+    return engine.connect().execution_options(stream_results=True, max_row_buffer=fetch_size)
+
+def read_database(engine, query, chunksize: int = None):
+    """
+    Run a query and return its result as pandas.
+
+    Parameters:
+    -----------
+    engine : sqlalchemy.engine.Engine or None
+        Database to query, the MASTER_DB engine (see `get_engine`) if None
+    query : str
+        SQL query
+    chunksize : int, optional
+        If set, return an iterator of DataFrames of at most `chunksize` rows,
+        streamed from a server-side cursor so the full result is never held in memory
+
+    Returns:
+    --------
+    pandas.DataFrame or iterator of pandas.DataFrame
+        The query result
+    """
+    engine = get_engine() if engine is None else engine
+    if chunksize is None:
+        df = pd.read_sql(query, con=engine)
+        return df
+    return _read_database_chunks(engine, query, chunksize)
+
+def _read_database_chunks(engine, query, chunksize: int):
+    # The connection stays open until the caller has consumed every chunk
+    with _streaming_connection(engine, chunksize) as conn:
+        yield from pd.read_sql(query, con=conn, chunksize=chunksize)
+
+def read_database_polars(engine, query, batch_size: int = None, schema_overrides: dict = None):
+    """
+    Run a query and return its result as Polars, without a pandas round-trip.
+
+    Takes the same arguments as `read_database`.
+
+    Parameters:
+    -----------
+    engine : sqlalchemy.engine.Engine or None
+        Database to query, the MASTER_DB engine (see `get_engine`) if None
+    query : str
+        SQL query
+    batch_size : int, optional
+        If set, return an iterator of DataFrames of at most `batch_size` rows,
+        streamed from a server-side cursor. Every batch has the column types of
+        the first batch, except columns that are NULL in every row of the first
+        batch, which take the type of the first batch where they have values
+    schema_overrides : dict, optional
+        Polars type of some columns, e.g. for columns that can be entirely NULL in a batch
+
+    Returns:
+    --------
+    polars.DataFrame or iterator of polars.DataFrame
+        The query result
+    """
+    engine = get_engine() if engine is None else engine
+    if batch_size is None:
+        with engine.connect() as conn:
+            return pl.read_database(query, connection=conn, schema_overrides=schema_overrides)
+    return _read_database_batches(engine, query, batch_size, schema_overrides)
+
+def _read_database_batches(engine, query, batch_size: int, schema_overrides: dict = None):
+    # Polars infers the types of every batch from its own rows, cast them to the types seen first
+    schema = {}
+    # The connection stays open until the caller has consumed every batch
+    with _streaming_connection(engine, batch_size) as conn:
+        batches = pl.read_database(
+            query, connection=conn, iter_batches=True, batch_size=batch_size, schema_overrides=schema_overrides
+        )
+        for batch in batches:
+            for name, dtype in batch.schema.items():
+                if schema.get(name, pl.Null) == pl.Null:
+                    schema[name] = dtype
+            yield batch.cast({name: dtype for name, dtype in schema.items() if dtype != pl.Null})